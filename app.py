@@ -1,12 +1,28 @@
+from pathlib import Path
+
 import streamlit as st
 
 from src import config
+from src.data.cache import default_cache
 from src.data.loader import load_trades_from_records
+from src.models.book import TradeBook
 from src.presets import manager as preset_manager
-from src.risk.metrics import compute_metrics
-from src.risk.ruin import ruin_table
-from src.simulation.engine import SimulationSettings, simulate
-from src.simulation.monte_carlo import run_monte_carlo
+from src.presets.batch import RANK_DESCENDING, evaluate_presets
+from src.risk.breakdown import grouped_metrics
+from src.risk.markov_ruin import approximation_check
+from src.risk.optimal_f import optimal_f
+from src.risk.rolling import rolling_metrics
+from src.risk.ruin import ruin_table, trade_r_multiples
+from src.simulation.monte_carlo import run_monte_carlo_parallel, run_monte_carlo_streaming
+from src.simulation.resampling import Resampling, ResamplingMode
+from src.simulation.result_cache import (
+    cached_empirical_ruin_table,
+    cached_metrics,
+    cached_monte_carlo,
+    cached_simulation,
+    default_result_cache,
+)
+from src.simulation.sweep import run_sweep, settings_grid
 from src.ui import components, layout
 
 
@@ -49,18 +65,18 @@ def sample_trades():
             "stop_price": 151.5,
         },
     ]
-    return load_trades_from_records(records)
+    return TradeBook.from_trades(load_trades_from_records(records))
 
 
 def main():
     st.set_page_config(page_title="資金管理シミュレーション", layout="wide")
     st.title("資金管理シミュレーション & 戦略評価")
 
-    settings, uploaded_df = layout.sidebar_settings()
-    trades = layout.parse_trades(uploaded_df)
+    settings, uploaded = layout.sidebar_settings()
+    trades = layout.parse_trades(uploaded)
 
-    use_sample = st.sidebar.checkbox("サンプルトレードを使う", value=not trades)
-    if use_sample and not trades:
+    use_sample = st.sidebar.checkbox("サンプルトレードを使う", value=not len(trades))
+    if use_sample and not len(trades):
         trades = sample_trades()
 
     st.sidebar.markdown("---")
@@ -68,25 +84,11 @@ def main():
     preset_name = st.sidebar.text_input("プリセット名")
 
     if preset_action == "保存" and preset_name:
-        preset_manager.save_preset(
-            preset_name,
-            {
-                "initial_equity": settings.initial_equity,
-                "max_portfolio_risk": settings.max_portfolio_risk,
-                "sizing_mode": settings.sizing_mode,
-                "params": settings.sizing_params.__dict__,
-            },
-        )
+        preset_manager.save_preset(preset_name, preset_manager.preset_from_settings(settings))
         st.sidebar.success(f"プリセットを保存しました: {preset_name}")
     elif preset_action == "読み込み" and preset_name:
         try:
-            data = preset_manager.load_preset(preset_name)
-            settings = SimulationSettings(
-                initial_equity=data.get("initial_equity", config.DEFAULT_INITIAL_EQUITY),
-                sizing_mode=data.get("sizing_mode", settings.sizing_mode),
-                sizing_params=settings.sizing_params.__class__(**data.get("params", {})),
-                max_portfolio_risk=data.get("max_portfolio_risk", config.DEFAULT_MAX_PORTFOLIO_RISK),
-            )
+            settings = preset_manager.settings_from_preset(preset_manager.load_preset(preset_name), settings)
             st.sidebar.success(f"プリセットを読み込みました: {preset_name}")
         except FileNotFoundError:
             st.sidebar.error("プリセットが見つかりませんでした。")
@@ -94,28 +96,109 @@ def main():
         preset_manager.delete_preset(preset_name)
         st.sidebar.info(f"プリセットを削除しました: {preset_name}")
 
-    tabs = st.tabs(["結果", "モンテカルロ", "破産確率", "プリセット一覧"])
+    # One simulation feeds the results and breakdown tabs.
+    results = cached_simulation(trades, settings) if len(trades) else None
+    tabs = st.tabs(["結果", "モンテカルロ", "破産確率", "プリセット一覧", "パラメータスイープ", "戦略・銘柄別"])
 
     with tabs[0]:
         st.header("シミュレーション結果")
-        if not trades:
+        if not len(trades):
             st.info("CSV をアップロードするかサンプルデータを有効にしてください。")
         else:
-            results = simulate(trades, settings)
-            metrics = compute_metrics(results, settings.initial_equity)
+            metrics = cached_metrics(trades, settings)
             components.metrics_table(metrics)
             components.equity_and_drawdown_charts(metrics)
 
+            st.subheader("ローリング指標")
+            cols = st.columns(2)
+            window_kind = cols[0].radio("ウィンドウ", ["直近トレード数", "直近日数"], horizontal=True)
+            if window_kind == "直近トレード数":
+                window = cols[1].number_input("トレード数", value=50, min_value=1, step=10)
+                rolling = rolling_metrics(results, trades=int(window))
+            else:
+                window = cols[1].number_input("日数", value=90.0, min_value=1.0, step=30.0)
+                rolling = rolling_metrics(results, days=window)
+            components.rolling_metrics_chart(rolling)
+
+            r_multiples = results.r_multiple[results.risk_amount > 0]
+            if len(r_multiples):
+                cols = st.columns(2)
+                dd_limit = cols[0].number_input(
+                    "許容最大ドローダウン (%)（0 = 制約なし）", value=0.0, min_value=0.0, max_value=99.0
+                )
+                safety = cols[1].number_input("適用時の安全係数", value=0.5, min_value=0.0, max_value=1.0)
+                best = optimal_f(r_multiples, max_drawdown=dd_limit / 100 if dd_limit > 0 else None)
+                components.optimal_f_section(best, safety, layout.apply_fixed_fraction)
+
     with tabs[1]:
         st.header("モンテカルロシミュレーション")
-        if not trades:
+        if not len(trades):
             st.info("トレードデータを読み込んでください。")
         else:
-            n_sims = st.number_input("試行回数", value=config.DEFAULT_MONTE_CARLO_SIMS, min_value=10, max_value=2000)
+            n_sims = st.number_input("試行回数", value=config.DEFAULT_MONTE_CARLO_SIMS, min_value=10, max_value=200_000)
             mc_runs = st.number_input("各試行のトレード数 (省略可)", value=0, min_value=0)
+            seed = st.number_input("乱数シード (0 でランダム)", value=0, min_value=0)
+            workers = st.number_input("並列プロセス数 (0 で CPU 数)", value=0, min_value=0)
+            resampling_labels = {
+                ResamplingMode.SHUFFLE: "シャッフル（トレード数指定時は復元抽出）",
+                ResamplingMode.IID: "復元抽出 (IID)",
+                ResamplingMode.BLOCK: "ブロック・ブートストラップ",
+                ResamplingMode.STATIONARY: "定常ブートストラップ（ブロック長は幾何分布）",
+            }
+            resampling_mode = st.selectbox(
+                "リサンプリング方式", list(resampling_labels), format_func=resampling_labels.get
+            )
+            block_modes = (ResamplingMode.BLOCK, ResamplingMode.STATIONARY)
+            block_length = st.number_input(
+                "ブロック長（定常は平均）", value=10.0, min_value=1.0, disabled=resampling_mode not in block_modes
+            )
+            by_day = st.checkbox("暦日単位でリサンプリング（同じ日のトレードをまとめて抽出。トレード数は日数として扱う）")
+            resampling = Resampling(resampling_mode, float(block_length), by_day)
+            auto_stop = st.checkbox("精度に達したら自動停止（試行回数は上限として使用）")
+            tolerance = st.number_input(
+                "許容誤差 (5%点の最終資産・中央値の最大DD、95%信頼区間の相対半幅 %)",
+                value=1.0,
+                min_value=0.01,
+                step=0.1,
+                disabled=not auto_stop,
+            )
+            jobs = layout.session_jobs()
             if st.button("モンテカルロ実行"):
-                mc_results = run_monte_carlo(trades, settings, int(n_sims), int(mc_runs) or None)
-                components.monte_carlo_section(mc_results)
+                description = f"試行回数 {int(n_sims):,}" + ("（上限・自動停止）" if auto_stop else "")
+                if seed:
+                    description += f" / 乱数シード {int(seed)}"
+                if auto_stop:
+                    jobs.submit(
+                        "monte_carlo",
+                        cached_monte_carlo,
+                        run_monte_carlo_streaming,
+                        trades,
+                        settings,
+                        seed=int(seed) or None,
+                        description=description,
+                        tolerance=float(tolerance) / 100,
+                        min_sims=min(1_000, int(n_sims)),
+                        max_sims=int(n_sims),
+                        n_trades=int(mc_runs) or None,
+                        workers=int(workers) or None,
+                        resampling=resampling,
+                    )
+                else:
+                    jobs.submit(
+                        "monte_carlo",
+                        cached_monte_carlo,
+                        run_monte_carlo_parallel,
+                        trades,
+                        settings,
+                        seed=int(seed) or None,
+                        description=description,
+                        n_sims=int(n_sims),
+                        n_trades=int(mc_runs) or None,
+                        workers=int(workers) or None,
+                        resampling=resampling,
+                        fan_points=config.MONTE_CARLO_FAN_POINTS,
+                    )
+            layout.job_panel("monte_carlo", components.monte_carlo_result)
 
     with tabs[2]:
         st.header("破産確率（簡易）")
@@ -124,16 +207,137 @@ def main():
         ruin_threshold = st.number_input("破産とみなす残高比", value=0.1, min_value=0.0, max_value=1.0)
         f_values = [i / 100 for i in range(1, 11)]
         rows = ruin_table(p, payoff_ratio, f_values, ruin_threshold)
-        components.ruin_table_component(rows)
+        exact_rows = None
+        if 0 < ruin_threshold < 1:
+            exact_rows = approximation_check(p, payoff_ratio, f_values, ruin_threshold)
+            st.caption(
+                "マルコフ連鎖：勝率と損益比の 2 点分布で、対数資産を離散化した状態間の遷移から"
+                "残高が初期資産 × 残高比 に達する確率を連立方程式で厳密に求めます（上限は初期資産の 100 倍）。"
+                "近似式はこの値から 1 桁以内なら一致とみなします。"
+            )
+            if not all(agrees for *_, agrees in exact_rows):
+                st.warning("近似式がマルコフ連鎖の厳密解から 1 桁以上ずれる f があります。損益比が 1 から離れるほど近似は粗くなります。")
+        empirical_rows = None
+        r_multiples = trade_r_multiples(trades)
+        if len(r_multiples):
+            st.subheader("実測 R 倍数によるモンテカルロ推定")
+            col1, col2 = st.columns(2)
+            with col1:
+                ruin_paths = st.number_input("試行回数", value=2_000, min_value=100, max_value=100_000, key="ruin_paths")
+            with col2:
+                ruin_horizon = st.number_input(
+                    "各試行のトレード数",
+                    value=min(len(r_multiples), config.DEFAULT_RUIN_HORIZON),
+                    min_value=1,
+                    key="ruin_horizon",
+                )
+            empirical_rows = cached_empirical_ruin_table(
+                r_multiples, f_values, ruin_threshold, int(ruin_paths), int(ruin_horizon), seed=0
+            )
+            st.caption(
+                f"ストップ付きトレード {len(r_multiples)} 件の R 倍数から復元抽出し、"
+                "残高が初期資産 × 残高比 以下になった試行を破産として数えます（95% 信頼区間付き）。"
+                "破産の定義は近似式・マルコフ連鎖と同じで、各試行をトレード数で打ち切る点（マルコフ連鎖は初期資産の 100 倍到達で打ち切り）だけが異なります。"
+            )
+        components.ruin_comparison_chart(rows, empirical_rows)
+        components.ruin_table_component(rows, empirical_rows, exact_rows)
 
     with tabs[3]:
         st.header("プリセット一覧")
-        presets = preset_manager.list_presets()
-        if presets:
-            st.write(presets)
+        store = preset_manager.default_store()
+        skipped = preset_manager.legacy_import_errors()
+        if skipped:
+            st.warning(
+                "読み込めなかった旧形式のプリセットがあります: "
+                + "、".join(f"{name}（{error}）" for name, error in skipped.items())
+            )
+        index = store.index()
+        if index:
+            components.preset_index_table(index)
         else:
             st.info("保存されたプリセットはありません。")
 
+        with st.expander("JSON インポート／エクスポート"):
+            files = st.file_uploader("プリセット JSON", type=["json"], accept_multiple_files=True)
+            if files and st.button("インポート"):
+                imported = 0
+                for file in files:
+                    try:
+                        preset_manager.import_preset(Path(file.name).stem, file.getvalue())
+                        imported += 1
+                    except ValueError as exc:  # includes JSON and UTF-8 decode errors
+                        st.error(f"{file.name} をインポートできませんでした: {exc}")
+                if imported:
+                    st.success(f"{imported} 件のプリセットをインポートしました。")
+            if index:
+                export_name = st.selectbox("エクスポートするプリセット", [row["name"] for row in index])
+                st.download_button(
+                    "JSON をダウンロード",
+                    preset_manager.export_preset(export_name),
+                    file_name=preset_manager.preset_path(export_name).name,
+                    mime="application/json",
+                )
+
+        st.subheader("全プリセットの一括評価")
+        if not len(trades):
+            st.info("トレードデータを読み込んでください。")
+        elif index:
+            cols = st.columns(3)
+            mode_filter = cols[0].selectbox(
+                "資金管理方式で絞り込み",
+                [None, *sorted({row["sizing_mode"] for row in index if row["sizing_mode"]})],
+                format_func=lambda m: "すべて" if m is None else m,
+            )
+            name_filter = cols[1].text_input("名前に含む文字列")
+            rank_by = cols[2].selectbox("順位付けの指標", list(RANK_DESCENDING))
+            jobs = layout.session_jobs()
+            if st.button("一括評価を実行"):
+                jobs.submit(
+                    "preset_evaluation",
+                    evaluate_presets,
+                    trades,
+                    settings,
+                    description=f"順位付け: {rank_by}",
+                    sizing_mode=mode_filter,
+                    pattern=name_filter or None,
+                    rank_by=rank_by,
+                )
+            layout.job_panel("preset_evaluation", components.preset_ranking_table)
+
+    with tabs[4]:
+        st.header("パラメータスイープ")
+        if not len(trades):
+            st.info("トレードデータを読み込んでください。")
+        else:
+            axes, labels = layout.sweep_controls(settings)
+            metric = st.selectbox("表示する指標", ["final_equity", "cagr", "max_drawdown", "max_dd_duration"])
+            if st.button("スイープ実行"):
+                sweep_df = run_sweep(trades, settings_grid(settings, **axes))
+                x, y = list(axes)
+                components.sweep_heatmap(sweep_df, x, y, metric, labels)
+                st.dataframe(sweep_df[[x, y, "final_equity", "cagr", "max_drawdown", "max_dd_duration"]])
+
+    with tabs[5]:
+        st.header("戦略・銘柄・市場別の内訳")
+        if results is None:
+            st.info("トレードデータを読み込んでください。")
+        else:
+            dimension = st.radio(
+                "集計単位",
+                ["strategy", "instrument", "market"],
+                format_func={"strategy": "戦略", "instrument": "銘柄", "market": "市場"}.get,
+                horizontal=True,
+            )
+            st.caption("各区分の資産曲線は、全体シミュレーションで決まったその区分のトレード損益だけを初期資金に積み上げたものです。")
+            components.breakdown_table(grouped_metrics(results, dimension, settings.initial_equity))
+
+    with st.expander("デバッグ: キャッシュ統計"):
+        result_cache = default_result_cache()
+        components.cache_stats_table({"結果キャッシュ": result_cache.stats(), "トレードファイルキャッシュ": default_cache().stats()})
+        cols = st.columns(2)
+        cols[0].button("結果キャッシュを消去", on_click=result_cache.invalidate)
+        cols[1].button("モンテカルロ結果のみ消去", on_click=result_cache.invalidate, args=("monte_carlo",))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1 @@
+"""Performance benchmarks (see ``python -m benchmarks.run --help``)."""
@@ -0,0 +1,374 @@
+"""Time each pipeline stage on synthetic trades and compare against a baseline.
+
+    python -m benchmarks.run                      # 10^3 .. 10^6 trades
+    python -m benchmarks.run --sizes 1e3,1e5,1e7  # 10^7 needs several GB
+    python -m benchmarks.run --quick              # 10^3 .. 10^5 trades
+    python -m benchmarks.run --update-baseline    # store this run as the baseline
+
+Per (stage, size) the fastest of several runs is recorded with its
+throughput, plus the peak traced allocation (``tracemalloc``) of one extra
+run. Results go to a JSON file; a stored baseline is compared with relative
+thresholds and the exit status is 1 on regression. Baselines are
+machine-local: one recorded on a different machine or library stack (see
+``COMPARED_ENVIRONMENT``) is not compared unless ``--force-compare`` is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticSpec, trade_csv
+from src import config
+from src.data.loader import load_trade_book, load_trades_csv
+from src.models.book import ResultBook, TradeBook
+from src.risk.markov_ruin import markov_ruin_table, r_distribution
+from src.risk.metrics import compute_metrics
+from src.risk.ruin import empirical_ruin_table, trade_r_multiples
+from src.risk.sizing import PositionSizingMode, PositionSizingParams
+from src.simulation.engine import SimulationSettings, simulate, simulate_book
+from src.simulation.monte_carlo import run_monte_carlo_parallel
+from src.simulation.overlap import OverlapMode
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]  # 10^7 is opt-in via --sizes
+QUICK_SIZES = [10**3, 10**4, 10**5]
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARK_DIR / "results" / "latest.json"
+DEFAULT_DATA_DIR = Path("cache_data") / "benchmarks"
+
+LEGACY_MAX_TRADES = 100_000  # list-of-Trade stages are skipped above this size
+MC_SIMS = 200
+MC_PATH_TRADES = 10_000  # Monte Carlo paths are capped at this many trades
+RUIN_F_VALUES = np.linspace(0.005, 0.1, 20)
+RUIN_PATHS = 2_000
+RUIN_PATH_TRADES = 1_000
+
+# Environment fields that must match the baseline's for timings to be comparable.
+COMPARED_ENVIRONMENT = ("platform", "machine", "processor", "cpus", "python", "numpy", "pandas")
+
+# A time regression must also exceed this many seconds, a memory one this
+# many bytes, so timer noise on millisecond stages is not reported.
+TIME_SLACK = 0.005
+MEMORY_SLACK = 1 << 20
+
+FULL_RISK_TRADES = 1_000  # above this size the risk per trade shrinks, see settings_for
+
+
+def settings_for(size: int, overlap_mode: str = OverlapMode.SEQUENTIAL) -> SimulationSettings:
+    """Fixed-fractional settings whose compounded equity stays finite at ``size`` trades.
+
+    A 1% risk on a winning strategy overflows float64 within 10^6 trades,
+    and inf/NaN arithmetic would not time like real workloads.
+    """
+    f = config.DEFAULT_FRACTIONAL_RISK * min(1.0, FULL_RISK_TRADES / max(size, 1))
+    return SimulationSettings(
+        initial_equity=config.DEFAULT_INITIAL_EQUITY,
+        sizing_mode=PositionSizingMode.FIXED_FRACTIONAL,
+        sizing_params=PositionSizingParams(f=f),
+        max_portfolio_risk=config.DEFAULT_MAX_PORTFOLIO_RISK,
+        overlap_mode=overlap_mode,
+    )
+
+
+@dataclass
+class Workload:
+    """Inputs shared by the stages of one size, built outside the timings."""
+
+    csv_path: Path
+    settings: SimulationSettings
+    _book: Optional[TradeBook] = None
+    _results: Optional[ResultBook] = None
+    _trades: Optional[list] = field(default=None, repr=False)
+
+    @property
+    def book(self) -> TradeBook:
+        if self._book is None:
+            self._book = load_trade_book(self.csv_path)
+        return self._book
+
+    @property
+    def results(self) -> ResultBook:
+        if self._results is None:
+            self._results = simulate_book(self.book, self.settings)
+        return self._results
+
+    @property
+    def trades(self) -> list:
+        if self._trades is None:
+            self._trades = self.book.to_trades()
+        return self._trades
+
+
+# Stage -> builder returning (work, units of work, unit name); None skips the size.
+Stage = Callable[[Workload, int], Optional[Tuple[Callable[[], Any], float, str]]]
+
+
+def _csv_load(w: Workload, size: int):
+    return (lambda: load_trade_book(w.csv_path)), size, "trades"
+
+
+def _csv_load_objects(w: Workload, size: int):
+    if size > LEGACY_MAX_TRADES:
+        return None
+    return (lambda: load_trades_csv(w.csv_path)), size, "trades"
+
+
+def _simulate(w: Workload, size: int):
+    book, settings = w.book, w.settings
+    return (lambda: simulate_book(book, settings)), size, "trades"
+
+
+def _simulate_objects(w: Workload, size: int):
+    if size > LEGACY_MAX_TRADES:
+        return None
+    trades, settings = w.trades, w.settings
+    return (lambda: simulate(trades, settings)), size, "trades"
+
+
+def _simulate_overlap(w: Workload, size: int):
+    book = w.book
+    settings = settings_for(size, OverlapMode.SCALE)
+    return (lambda: simulate_book(book, settings)), size, "trades"
+
+
+def _metrics(w: Workload, size: int):
+    results = w.results
+    initial_equity = w.settings.initial_equity
+    return (lambda: compute_metrics(results, initial_equity)), size, "trades"
+
+
+def _monte_carlo(w: Workload, size: int):
+    book, settings = w.book, w.settings
+    path = min(size, MC_PATH_TRADES)
+
+    def work():
+        return run_monte_carlo_parallel(book, settings, MC_SIMS, n_trades=path, seed=0, workers=1)
+
+    return work, MC_SIMS * path, "path-trades"
+
+
+def _ruin_table(w: Workload, size: int):
+    r = trade_r_multiples(w.book)
+
+    def work():
+        empirical_ruin_table(r, RUIN_F_VALUES, n_paths=RUIN_PATHS, n_trades=RUIN_PATH_TRADES, seed=0)
+        return markov_ruin_table(*r_distribution(r), RUIN_F_VALUES)
+
+    return work, len(RUIN_F_VALUES) * RUIN_PATHS * RUIN_PATH_TRADES, "path-trades"
+
+
+STAGES: Dict[str, Stage] = {
+    "csv_load": _csv_load,
+    "csv_load_objects": _csv_load_objects,
+    "simulate": _simulate,
+    "simulate_objects": _simulate_objects,
+    "simulate_overlap": _simulate_overlap,
+    "metrics": _metrics,
+    "monte_carlo": _monte_carlo,
+    "ruin_table": _ruin_table,
+}
+
+
+def measure(work: Callable[[], Any], min_time: float, max_repeat: int, memory: bool) -> Dict[str, float]:
+    """Best wall time over runs until ``min_time`` elapses (at most ``max_repeat``), and peak memory."""
+    times: List[float] = []
+    while len(times) < max_repeat and (not times or sum(times) < min_time):
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            work()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(times), "runs": len(times), "peak_bytes": peak}
+
+
+def run_benchmarks(
+    sizes: List[int],
+    stages: List[str],
+    spec: SyntheticSpec,
+    seed: int = 0,
+    data_dir: Path = DEFAULT_DATA_DIR,
+    min_time: float = 0.5,
+    max_repeat: int = 5,
+    memory: bool = True,
+    log: Callable[[str], None] = print,
+) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        start = time.perf_counter()
+        workload = Workload(trade_csv(replace(spec, n_trades=size), data_dir, seed), settings_for(size))
+        log(f"[{size:>10,}] data ready in {time.perf_counter() - start:.1f}s")
+        for stage in stages:
+            built = STAGES[stage](workload, size)
+            if built is None:
+                log(f"[{size:>10,}] {stage:<18} skipped")
+                continue
+            work, units, unit = built
+            timing = measure(work, min_time, max_repeat, memory)
+            row = {"stage": stage, "size": size, **timing, "throughput": units / timing["seconds"], "unit": unit}
+            rows.append(row)
+            peak = "-" if row["peak_bytes"] is None else f"{row['peak_bytes'] / 2**20:,.1f} MiB"
+            log(f"[{size:>10,}] {stage:<18} {row['seconds']:>9.4f}s {row['throughput']:>14,.0f} {unit}/s  peak {peak}")
+    return rows
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def environment_changes(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """``COMPARED_ENVIRONMENT`` fields that differ, as ``"field: old -> new"``."""
+    return [
+        f"{key}: {baseline.get(key)!r} -> {current.get(key)!r}"
+        for key in COMPARED_ENVIRONMENT
+        if baseline.get(key) != current.get(key)
+    ]
+
+
+def compare(
+    rows: List[Dict], baseline: List[Dict], threshold: float = 0.25, memory_threshold: float = 0.25
+) -> List[Dict]:
+    """Per (stage, size) present in both runs: ratios to the baseline and regression flags."""
+    known = {(row["stage"], row["size"]): row for row in baseline}
+    report = []
+    for row in rows:
+        base = known.get((row["stage"], row["size"]))
+        if base is None:
+            continue
+        time_ratio = row["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        slower = time_ratio > 1 + threshold and row["seconds"] - base["seconds"] > TIME_SLACK
+        memory_ratio, larger = None, False
+        if row.get("peak_bytes") is not None and base.get("peak_bytes"):
+            memory_ratio = row["peak_bytes"] / base["peak_bytes"]
+            larger = memory_ratio > 1 + memory_threshold and row["peak_bytes"] - base["peak_bytes"] > MEMORY_SLACK
+        report.append(
+            {
+                "stage": row["stage"],
+                "size": row["size"],
+                "time_ratio": time_ratio,
+                "memory_ratio": memory_ratio,
+                "regression": slower or larger,
+            }
+        )
+    return report
+
+
+def _load(path: Path) -> Dict:
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump(data: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(float(value)) for value in text.split(",") if value.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=_sizes, default=DEFAULT_SIZES, help="comma separated, e.g. 1e3,1e5")
+    parser.add_argument("--quick", action="store_true", help=f"sizes {QUICK_SIZES}")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated subset of stages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="where generated CSVs are kept")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write this run to --baseline")
+    parser.add_argument(
+        "--force-compare", action="store_true", help="compare even if the baseline was recorded on another machine"
+    )
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="allowed relative peak memory growth")
+    parser.add_argument("--min-time", type=float, default=0.5, help="repeat a stage until this many seconds")
+    parser.add_argument("--max-repeat", type=int, default=5)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced run for peak memory")
+    parser.add_argument("--strategies", type=int, default=SyntheticSpec.strategies)
+    parser.add_argument("--instruments", type=int, default=SyntheticSpec.instruments)
+    parser.add_argument("--overlap", type=float, default=SyntheticSpec.overlap, help="mean open positions")
+    parser.add_argument("--win-rate", type=float, default=SyntheticSpec.win_rate)
+    parser.add_argument("--avg-win-r", type=float, default=SyntheticSpec.avg_win_r)
+    parser.add_argument("--avg-loss-r", type=float, default=SyntheticSpec.avg_loss_r)
+    parser.add_argument("--r-dispersion", type=float, default=SyntheticSpec.r_dispersion)
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    spec = SyntheticSpec(
+        n_trades=0,
+        strategies=args.strategies,
+        instruments=args.instruments,
+        overlap=args.overlap,
+        win_rate=args.win_rate,
+        avg_win_r=args.avg_win_r,
+        avg_loss_r=args.avg_loss_r,
+        r_dispersion=args.r_dispersion,
+    )
+    sizes = QUICK_SIZES if args.quick else args.sizes
+    rows = run_benchmarks(
+        sizes, stages, spec, args.seed, args.data_dir, args.min_time, args.max_repeat, not args.no_memory
+    )
+    spec_fields = {k: v for k, v in asdict(spec).items() if k != "n_trades"}
+    run = {"environment": environment(), "spec": spec_fields, "seed": args.seed, "results": rows}
+
+    status = 0
+    if args.baseline.exists() and not args.update_baseline:
+        baseline = _load(args.baseline)
+        changes = environment_changes(baseline.get("environment", {}), run["environment"])
+        if baseline.get("spec") != json.loads(json.dumps(spec_fields)) or baseline.get("seed") != args.seed:
+            print("baseline was recorded with a different workload; not compared")
+        elif changes and not args.force_compare:
+            print("baseline was recorded in a different environment; not compared (--force-compare to override)")
+            for change in changes:
+                print(f"  {change}")
+        else:
+            run["comparison"] = compare(rows, baseline["results"], args.threshold, args.memory_threshold)
+            for entry in run["comparison"]:
+                memory = "-" if entry["memory_ratio"] is None else f"{entry['memory_ratio']:.2f}x"
+                flag = "REGRESSION" if entry["regression"] else "ok"
+                print(f"{entry['stage']:<18} {entry['size']:>10,}  time {entry['time_ratio']:.2f}x  memory {memory}  {flag}")
+            if any(entry["regression"] for entry in run["comparison"]):
+                status = 1
+    _dump(run, args.output)
+    print(f"results written to {args.output}")
+    if args.update_baseline:
+        _dump(run, args.baseline)
+        print(f"baseline written to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Seeded synthetic trade histories in the app's CSV format.
+
+Trades are generated in fixed-size chunks, each from its own
+``SeedSequence.spawn`` child, so a (spec, seed) pair always produces the
+same file and 10^7-row files are written without holding them in memory.
+
+- entries are spread evenly (with jitter) over ``years`` in entry order;
+  holding periods are exponential with mean ``overlap`` entry spacings, so
+  about ``overlap`` positions are open at any time
+- each trade wins with ``win_rate``; R magnitudes are gamma distributed
+  with means ``avg_win_r`` / ``avg_loss_r`` and coefficient of variation
+  ``r_dispersion`` (0 gives a two-point distribution)
+- stops sit 1-3% from the entry; exits are placed so the trade realizes
+  its R multiple
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 1_000_000
+CSV_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_LOSS_R = 10.0  # keeps exit prices positive with stops at most 3% away
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    n_trades: int
+    strategies: int = 3
+    instruments: int = 50
+    markets: tuple = ("JP", "US", "FX")
+    years: float = 5.0
+    overlap: float = 2.0  # mean number of open positions
+    win_rate: float = 0.45
+    avg_win_r: float = 1.8
+    avg_loss_r: float = 1.0
+    r_dispersion: float = 0.5
+    missing_stop_share: float = 0.0  # trades without a stop (R = 0 in the app)
+    fixed_quantity_share: float = 0.0  # trades carrying their own quantity
+    start: str = "2015-01-05 09:00:00"
+
+    def file_name(self, seed: int) -> str:
+        digest = hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:12]
+        return f"trades_{self.n_trades}_{seed}_{digest}.csv"
+
+
+def _magnitudes(rng: np.random.Generator, mean: float, cv: float, n: int) -> np.ndarray:
+    if cv <= 0:
+        return np.full(n, mean)
+    shape = 1.0 / cv**2
+    return rng.gamma(shape, mean / shape, n)
+
+
+def _chunk(spec: SyntheticSpec, rng: np.random.Generator, first: int, n: int) -> pd.DataFrame:
+    index = np.arange(first, first + n)
+    spacing = spec.years * 365.25 * 86_400 / max(spec.n_trades, 1)  # seconds between entries
+    start = pd.Timestamp(spec.start)
+    entry_offset = (index + rng.random(n)) * spacing
+    holding = rng.exponential(spec.overlap * spacing, n) + 60.0
+    entry_time = start + pd.to_timedelta(entry_offset.round(), unit="s")
+    exit_time = start + pd.to_timedelta((entry_offset + holding).round(), unit="s")
+
+    wins = rng.random(n) < spec.win_rate
+    r = np.where(
+        wins,
+        _magnitudes(rng, spec.avg_win_r, spec.r_dispersion, n),
+        -np.minimum(_magnitudes(rng, spec.avg_loss_r, spec.r_dispersion, n), MAX_LOSS_R),
+    )
+    direction = np.where(rng.random(n) < 0.5, 1.0, -1.0)
+    entry_price = np.exp(rng.normal(np.log(1_000.0), 1.0, n)).round(2)
+    stop_distance = entry_price * rng.uniform(0.01, 0.03, n)
+    stop_price = entry_price - direction * stop_distance
+    exit_price = entry_price + direction * r * stop_distance
+    stop_price[rng.random(n) < spec.missing_stop_share] = np.nan
+    quantity = np.where(rng.random(n) < spec.fixed_quantity_share, rng.integers(1, 100, n), np.nan)
+
+    instrument = rng.integers(0, spec.instruments, n)
+    return pd.DataFrame(
+        {
+            "trade_id": "T" + pd.Series(index).astype(str),
+            "strategy_id": "S" + pd.Series(rng.integers(0, spec.strategies, n)).astype(str),
+            "instrument": "I" + pd.Series(instrument).astype(str),
+            "market": np.asarray(spec.markets, dtype=object)[instrument % len(spec.markets)],
+            "entry_datetime": entry_time,
+            "exit_datetime": exit_time,
+            "side": np.where(direction > 0, "LONG", "SHORT"),
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "stop_price": stop_price,
+            "quantity": quantity,
+            "comment": "",
+        }
+    )
+
+
+def iter_trade_frames(spec: SyntheticSpec, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """The synthetic trades as consecutive DataFrame chunks in entry order."""
+    n_chunks = -(-spec.n_trades // chunk_rows)
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    for i, child in enumerate(children):
+        first = i * chunk_rows
+        yield _chunk(spec, np.random.default_rng(child), first, min(chunk_rows, spec.n_trades - first))
+
+
+def generate_trades(spec: SyntheticSpec, seed: int = 0) -> pd.DataFrame:
+    """All synthetic trades in one DataFrame (CSV column layout)."""
+    frames = list(iter_trade_frames(spec, seed))
+    return pd.concat(frames, ignore_index=True) if frames else _chunk(spec, np.random.default_rng(seed), 0, 0)
+
+
+def write_trade_csv(spec: SyntheticSpec, path: str | Path, seed: int = 0) -> Path:
+    """Write the synthetic trades as a CSV the app's loader accepts."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        for i, frame in enumerate(iter_trade_frames(spec, seed)):
+            frame.to_csv(f, index=False, header=i == 0, date_format=CSV_DATETIME_FORMAT, float_format="%.8g")
+    tmp.replace(path)
+    return path
+
+
+def trade_csv(spec: SyntheticSpec, directory: str | Path, seed: int = 0) -> Path:
+    """Path of the (spec, seed) CSV in ``directory``, generated on first use."""
+    path = Path(directory) / spec.file_name(seed)
+    return path if path.exists() else write_trade_csv(spec, path, seed)
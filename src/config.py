@@ -6,3 +6,20 @@ DEFAULT_FRACTIONAL_RISK = 0.01  # 1% per trade for fixed fractional
 DEFAULT_KELLY_SAFETY_COEFFICIENT = 0.5
 DEFAULT_MONTE_CARLO_SIMS = 200
 PRESET_DIR = "presets_data"
+PRESET_DB_PATH = "presets_data/presets.sqlite3"  # indexed preset store (JSON files are import/export only)
+PRESETS_PER_TASK = 32  # presets per worker task in batch evaluation
+BACKGROUND_JOB_WORKERS = 2  # threads running background jobs (Monte Carlo) for all sessions
+WORKER_START_METHOD = "spawn"  # process pools start from background job threads, so never fork
+DEFAULT_STREAM_CHUNKSIZE = 100_000  # rows per chunk for streaming CSV loads
+TRADE_CACHE_DIR = "cache_data/trades"
+TRADE_CACHE_MAX_BYTES = 1 << 30  # 1 GiB of parsed trade columns
+RESULT_CACHE_MAX_BYTES = 512 << 20  # in-memory simulation / Monte Carlo results
+RESULT_CACHE_DIR = None  # e.g. "cache_data/results" to keep results on disk across restarts
+RESULT_CACHE_DISK_MAX_BYTES = 2 << 30
+MONTE_CARLO_MAX_CHUNK_CELLS = 1 << 20  # paths x trades per vectorized Monte Carlo chunk (8 MB of float64)
+MONTE_CARLO_STREAM_PATHS = 256  # paths per independent random substream (fixes results for a seed)
+DEFAULT_RUIN_HORIZON = 1_000  # trades per path for the empirical risk of ruin
+MAX_CHART_POINTS = 4_000  # rows sent to a line chart; longer series are downsampled keeping extremes
+HISTOGRAM_BINS = 60  # Monte Carlo distributions are sent pre-binned
+MONTE_CARLO_FAN_POINTS = 200  # trades sampled per path for the percentile fan chart
+NS_PER_DAY = 86_400 * 10**9  # trade timestamps are int64 nanoseconds
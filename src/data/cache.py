@@ -0,0 +1,203 @@
+"""Content-addressed on-disk cache of parsed trade files.
+
+Entries are keyed by the SHA-256 of the raw input bytes (plus the storage
+format version) and stored as one ``.npy`` file per ``TradeBook`` column, so
+a repeat load memory-maps the columns instead of parsing CSV text. The cache
+directory is bounded in size and evicts least-recently-used entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import fields
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import config
+from src.data.loader import TradeSource, load_trade_book
+from src.models.book import Categorical, TradeBook
+
+_HASH_BLOCK = 1 << 20
+
+# Part of every key: bump when TradeBook's columns, their dtypes or the
+# on-disk layout change, so entries written in the old format are not mapped.
+CACHE_FORMAT_VERSION = 1
+
+
+def hash_bytes(data) -> str:
+    """SHA-256 hex digest of a bytes-like object (no copy for memoryviews)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(source: TradeSource) -> Optional[str]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest = hash_bytes(source)
+    elif hasattr(source, "getbuffer"):
+        digest = hash_bytes(source.getbuffer())
+    elif isinstance(source, (str, Path)):
+        digest = hash_file(source)
+    else:
+        return None
+    return f"{digest}-v{CACHE_FORMAT_VERSION}"
+
+
+def _write_book(book: TradeBook, directory: Path) -> None:
+    def save(stem: str, values: np.ndarray) -> None:
+        np.save(directory / f"{stem}.npy", np.ascontiguousarray(values), allow_pickle=False)
+
+    for f in fields(TradeBook):
+        value = getattr(book, f.name)
+        if isinstance(value, Categorical):
+            save(f"{f.name}.codes", value.codes)
+            save(f"{f.name}.categories", value.categories)
+        else:
+            save(f.name, value)
+
+
+def _read_book(directory: Path) -> TradeBook:
+    def load(stem: str) -> np.ndarray:
+        return np.load(directory / f"{stem}.npy", mmap_mode="r", allow_pickle=False)
+
+    columns = {}
+    for f in fields(TradeBook):
+        if f.type == "Categorical":
+            columns[f.name] = Categorical(load(f"{f.name}.codes"), load(f"{f.name}.categories"))
+        else:
+            columns[f.name] = load(f.name)
+    return TradeBook(**columns)
+
+
+def _entry_size(directory: Path) -> int:
+    return sum(p.stat().st_size for p in directory.iterdir())
+
+
+class TradeFileCache:
+    """Size-bounded LRU cache of parsed trade files keyed by content hash."""
+
+    def __init__(self, directory: str | Path = config.TRADE_CACHE_DIR, max_bytes: int = config.TRADE_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str) -> Optional[TradeBook]:
+        """Memory-map a cached book, or return None (counted as a miss).
+
+        A partial or corrupt entry is removed so the next ``put`` rewrites it.
+        """
+        path = self._entry_dir(key)
+        try:
+            book = _read_book(path)
+            os.utime(path)  # mtime doubles as the LRU clock
+        except (OSError, EOFError, ValueError):  # missing, truncated or corrupt column files
+            if path.exists():
+                shutil.rmtree(path, ignore_errors=True)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return book
+
+    def put(self, key: str, book: TradeBook) -> None:
+        """Store a book; entries larger than the whole budget are skipped."""
+        if book.nbytes > self.max_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self._entry_dir(key)
+        if target.exists():
+            return
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.directory))
+        try:
+            _write_book(book, tmp)
+            os.replace(tmp, target)
+        except OSError:
+            # Another process stored the same key first; keep theirs.
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict()
+
+    def load(self, source: TradeSource) -> TradeBook:
+        """Return the parsed book for ``source``, parsing only on a cache miss.
+
+        Sources without stable bytes (DataFrames, non-seekable streams) are
+        parsed directly and not cached. A cached source's book carries its
+        content key as ``source_digest``.
+        """
+        key = _source_key(source)
+        if key is None:
+            return load_trade_book(source)
+        book = self.get(key)
+        if book is None:
+            book = load_trade_book(source)
+            self.put(key, book)
+        # Lets result_cache.book_fingerprint reuse the hash instead of
+        # rehashing every column of a book that is new on each rerun.
+        object.__setattr__(book, "source_digest", key)
+        return book
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            if path.is_dir() and not path.name.startswith("."):
+                entries.append((path.stat().st_mtime, _entry_size(path), path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self) -> Dict[str, float]:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_default_cache: Optional[TradeFileCache] = None
+
+
+def default_cache() -> TradeFileCache:
+    """Process-wide cache shared by Streamlit reruns."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TradeFileCache()
+    return _default_cache
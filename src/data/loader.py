@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import io
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from src.models.book import TradeBook
 from src.models.trade import Trade
 
 REQUIRED_TRADE_COLUMNS = [
@@ -23,6 +26,41 @@ REQUIRED_TRADE_COLUMNS = [
 
 OPTIONAL_TRADE_COLUMNS = ["market", "stop_price", "quantity", "comment"]
 
+TEXT_COLUMNS = ["trade_id", "strategy_id", "instrument", "market", "side", "comment"]
+DATETIME_COLUMNS = ["entry_datetime", "exit_datetime"]
+PRICE_COLUMNS = ["entry_price", "exit_price"]
+OPTIONAL_NUMERIC_COLUMNS = ["stop_price", "quantity"]
+
+# dtype hints for pd.read_csv: keep text columns as text (no "001" -> 1 coercion)
+# and let numeric/datetime columns be converted column-wise after reading.
+TRADE_CSV_DTYPES: Dict[str, object] = {col: str for col in TEXT_COLUMNS}
+
+# Anything pd.read_csv accepts, a raw byte buffer, or an already-parsed frame.
+TradeSource = Union[str, Path, bytes, bytearray, memoryview, io.IOBase, pd.DataFrame]
+
+VALID_SIDES = ("LONG", "SHORT")
+MAX_REPORTED_ERRORS = 20
+
+
+class TradeValidationError(ValueError):
+    """Raised when one or more trade rows fail validation.
+
+    ``errors`` holds ``(row, column, message)`` tuples where ``row`` is the
+    1-based data row number (header excluded).
+    """
+
+    def __init__(self, errors: List[Tuple[int, str, str]]):
+        self.errors = sorted(errors)
+        rows = sorted({row for row, _, _ in self.errors})
+        lines = [f"row {row} ({column}): {message}" for row, column, message in self.errors[:MAX_REPORTED_ERRORS]]
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            lines.append(f"... and {len(self.errors) - MAX_REPORTED_ERRORS} more")
+        super().__init__(f"{len(rows)} invalid trade row(s):\n" + "\n".join(lines))
+
+    @property
+    def rows(self) -> List[int]:
+        return sorted({row for row, _, _ in self.errors})
+
 
 def _parse_datetime(value) -> datetime:
     if isinstance(value, datetime):
@@ -33,38 +71,149 @@ def _parse_datetime(value) -> datetime:
         raise ValueError(f"Invalid datetime value: {value}") from exc
 
 
-def load_trades_csv(file_path: str | Path) -> List[Trade]:
-    """Load trades from CSV and validate required columns."""
-    df = pd.read_csv(file_path)
+def _parse_datetime_column(values: pd.Series) -> pd.Series:
+    """Parse a whole column; only cells the inferred format misses are re-parsed."""
+    parsed = pd.to_datetime(values, errors="coerce")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed.loc[retry] = pd.to_datetime(values[retry], errors="coerce", format="mixed")
+    return parsed
+
 
+def _clean_text(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip()
+    return text.mask((text == "").fillna(False))
+
+
+def _to_object(values: pd.Series) -> pd.Series:
+    return values.astype(object).where(values.notna(), None)
+
+
+def read_trade_csv(file_path_or_buffer) -> pd.DataFrame:
+    """Read a trade CSV with dtype hints, without validating it."""
+    return pd.read_csv(file_path_or_buffer, dtype=TRADE_CSV_DTYPES, keep_default_na=True)
+
+
+def read_trade_table(source: TradeSource) -> pd.DataFrame:
+    """Return a raw trade table from any supported source.
+
+    DataFrames are passed through untouched and ``bytes`` are wrapped in a
+    ``BytesIO`` that shares the buffer, so no intermediate text or frame copy
+    is made before validation.
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return read_trade_csv(io.BytesIO(source))
+    return read_trade_csv(source)
+
+
+def validate_trade_frame(df: pd.DataFrame, row_offset: int = 0) -> pd.DataFrame:
+    """Validate and cast a raw trade table column by column.
+
+    Returns a new frame holding only the known trade columns with normalized
+    dtypes (text as object, datetimes as ``datetime64``, numbers as float).
+    All bad cells are collected and raised together as a ``TradeValidationError``.
+    ``row_offset`` shifts reported row numbers (used for chunked reads).
+    """
     missing = [col for col in REQUIRED_TRADE_COLUMNS if col not in df.columns]
     if missing:
         raise ValueError(f"Missing required columns: {', '.join(missing)}")
 
-    trades: List[Trade] = []
-    for _, row in df.iterrows():
-        try:
-            trade = Trade(
-                trade_id=str(row["trade_id"]),
-                strategy_id=str(row["strategy_id"]),
-                instrument=str(row["instrument"]),
-                market=str(row["market"]) if "market" in row and not pd.isna(row["market"]) else None,
-                entry_datetime=_parse_datetime(row["entry_datetime"]),
-                exit_datetime=_parse_datetime(row["exit_datetime"]),
-                side=str(row["side"]).upper(),
-                entry_price=float(row["entry_price"]),
-                exit_price=float(row["exit_price"]),
-                stop_price=float(row["stop_price"])
-                if "stop_price" in row and not pd.isna(row["stop_price"])
-                else None,
-                quantity=float(row["quantity"]) if "quantity" in row and not pd.isna(row["quantity"]) else None,
-                comment=str(row["comment"]) if "comment" in row and not pd.isna(row["comment"]) else None,
-            )
-        except Exception as exc:
-            raise ValueError(f"Failed to parse trade row: {row}") from exc
-        trades.append(trade)
+    n_rows = len(df)
+    row_numbers = np.arange(n_rows) + row_offset + 1
+    errors: List[Tuple[int, str, str]] = []
 
-    return trades
+    def report(column: str, bad: np.ndarray, message: str, values: Optional[pd.Series] = None) -> None:
+        for pos in np.flatnonzero(bad):
+            detail = f"{message}: {values.iloc[pos]!r}" if values is not None else message
+            errors.append((int(row_numbers[pos]), column, detail))
+
+    out: Dict[str, pd.Series] = {}
+
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            out[col] = _clean_text(df[col].reset_index(drop=True))
+        else:
+            out[col] = pd.Series(pd.NA, index=range(n_rows), dtype="string")
+
+    for col in ("trade_id", "strategy_id", "instrument"):
+        report(col, out[col].isna().to_numpy(), "value is required")
+
+    side = out["side"].str.upper()
+    report("side", ~side.isin(VALID_SIDES).fillna(False).to_numpy(bool), "must be LONG or SHORT", out["side"])
+    out["side"] = side
+    for col in TEXT_COLUMNS:
+        out[col] = _to_object(out[col])
+
+    for col in DATETIME_COLUMNS:
+        raw = df[col].reset_index(drop=True)
+        parsed = _parse_datetime_column(raw)
+        report(col, parsed.isna().to_numpy(), "invalid datetime", raw)
+        out[col] = parsed
+
+    for col in PRICE_COLUMNS + OPTIONAL_NUMERIC_COLUMNS:
+        if col not in df.columns:
+            out[col] = pd.Series(np.full(n_rows, np.nan))
+            continue
+        raw = df[col].reset_index(drop=True)
+        parsed = pd.to_numeric(raw, errors="coerce").astype(float)
+        if col in PRICE_COLUMNS:
+            bad = parsed.isna().to_numpy()
+        else:
+            bad = (parsed.isna() & raw.notna()).to_numpy()
+        report(col, bad, "invalid number", raw)
+        out[col] = parsed
+
+    if errors:
+        raise TradeValidationError(errors)
+
+    return pd.DataFrame(out, columns=REQUIRED_TRADE_COLUMNS + OPTIONAL_TRADE_COLUMNS)
+
+
+def _optional(values: pd.Series) -> list:
+    if values.dtype == object:
+        return values.tolist()
+    return [None if v != v else v for v in values.tolist()]
+
+
+def trades_from_frame(frame: pd.DataFrame) -> List[Trade]:
+    """Build ``Trade`` objects from a frame returned by ``validate_trade_frame``."""
+    columns = zip(
+        frame["trade_id"].tolist(),
+        frame["strategy_id"].tolist(),
+        frame["instrument"].tolist(),
+        _optional(frame["market"]),
+        frame["entry_datetime"].tolist(),
+        frame["exit_datetime"].tolist(),
+        frame["side"].tolist(),
+        frame["entry_price"].tolist(),
+        frame["exit_price"].tolist(),
+        _optional(frame["stop_price"]),
+        _optional(frame["quantity"]),
+        _optional(frame["comment"]),
+    )
+    return [Trade(*values) for values in columns]
+
+
+def load_trade_frame(source: TradeSource) -> pd.DataFrame:
+    """Read (if needed) and validate trades from a path, buffer or DataFrame."""
+    return validate_trade_frame(read_trade_table(source))
+
+
+def load_trade_book(source: TradeSource) -> TradeBook:
+    """Load validated trades into a columnar ``TradeBook``."""
+    return TradeBook.from_frame(load_trade_frame(source))
+
+
+def load_trades(source: TradeSource) -> List[Trade]:
+    """Load validated trades from a path, byte buffer or parsed DataFrame."""
+    return trades_from_frame(load_trade_frame(source))
+
+
+def load_trades_csv(file_path: str | Path) -> List[Trade]:
+    """Load trades from CSV and validate required columns."""
+    return load_trades(file_path)
 
 
 def load_trades_from_records(records: Iterable[dict]) -> List[Trade]:
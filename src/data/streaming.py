@@ -0,0 +1,190 @@
+"""Chunked trade loading with bounded memory.
+
+Large CSVs are read ``chunksize`` rows at a time, validated per chunk and
+returned as ``TradeBook`` batches in entry-time order. Input that is not
+already ordered is sorted externally: each chunk is sorted in memory and
+spilled to a temporary run file, then runs are k-way merged back, so peak
+memory stays at a small multiple of ``chunksize`` rows whatever the file
+size.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.data.loader import TRADE_CSV_DTYPES, validate_trade_frame
+from src.models.book import TradeBook
+
+# A batch travels with the 0-based source row numbers of its trades; they
+# break entry-time ties so the merged order equals a stable full sort.
+Batch = Tuple[TradeBook, np.ndarray]
+
+MERGE_FAN_IN = 16
+
+
+def _sorted_batch(book: TradeBook, rows: np.ndarray) -> Batch:
+    order = np.lexsort((rows, book.entry_time))
+    return book[order], rows[order]
+
+
+class _RunWriter:
+    """Append-only run file holding consecutive pickled batches."""
+
+    def __init__(self, directory: Path, piece_size: int):
+        fd, name = tempfile.mkstemp(suffix=".run", dir=directory)
+        self.path = Path(name)
+        self._file = os.fdopen(fd, "wb")
+        self._piece_size = piece_size
+        self.last_key: Optional[Tuple[int, int]] = None
+
+    def write(self, batch: Batch) -> None:
+        book, rows = batch
+        for start in range(0, len(book), self._piece_size):
+            stop = start + self._piece_size
+            pickle.dump((book[start:stop], rows[start:stop]), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(book):
+            self.last_key = (int(book.entry_time[-1]), int(rows[-1]))
+
+    def close(self) -> Path:
+        self._file.close()
+        return self.path
+
+
+def _read_run(path: Path) -> Iterator[Batch]:
+    try:
+        with path.open("rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _merge(runs: List[Iterator[Batch]]) -> Iterator[Batch]:
+    """K-way merge of sorted batch streams into sorted batches.
+
+    Each round emits every buffered row whose key is <= the smallest
+    "last buffered key" among the runs; that prefix cannot be preceded by
+    anything still on disk.
+    """
+    buffers: List[Optional[Batch]] = [next(run, None) for run in runs]
+    while True:
+        active = [i for i, b in enumerate(buffers) if b is not None]
+        if not active:
+            return
+        bound = min((int(buffers[i][0].entry_time[-1]), int(buffers[i][1][-1])) for i in active)
+        heads: List[Batch] = []
+        for i in active:
+            book, rows = buffers[i]
+            times = book.entry_time
+            take = int(np.searchsorted(times, bound[0], side="left"))
+            take += int(np.count_nonzero(rows[take:][times[take:] == bound[0]] <= bound[1]))
+            if take:
+                heads.append((book[:take], rows[:take]))
+            if take == len(book):
+                buffers[i] = next(runs[i], None)
+            else:
+                buffers[i] = (book[take:], rows[take:])
+        yield _sorted_batch(TradeBook.concat([h[0] for h in heads]), np.concatenate([h[1] for h in heads]))
+
+
+def _coalesce(batches: Iterator[Batch], size: int) -> Iterator[Batch]:
+    """Regroup small merged batches into batches of roughly ``size`` rows."""
+    pending: List[Batch] = []
+    count = 0
+    for batch in batches:
+        pending.append(batch)
+        count += len(batch[0])
+        if count >= size:
+            yield TradeBook.concat([b[0] for b in pending]), np.concatenate([b[1] for b in pending])
+            pending, count = [], 0
+    if pending:
+        yield TradeBook.concat([b[0] for b in pending]), np.concatenate([b[1] for b in pending])
+
+
+def _external_sort(batches: Iterator[Batch], chunksize: int, spill_dir: Path) -> Iterator[Batch]:
+    piece_size = max(1, chunksize // MERGE_FAN_IN)
+    paths: List[Path] = []
+    writer: Optional[_RunWriter] = None
+    for batch in batches:
+        book, rows = _sorted_batch(*batch)
+        if not len(book):
+            continue
+        first_key = (int(book.entry_time[0]), int(rows[0]))
+        # Chunks that continue the current run in order are appended to it, so
+        # already-sorted input ends up as a single run and needs no merging.
+        if writer is None or writer.last_key > first_key:
+            if writer is not None:
+                paths.append(writer.close())
+            writer = _RunWriter(spill_dir, piece_size)
+        writer.write((book, rows))
+    if writer is not None:
+        paths.append(writer.close())
+
+    while len(paths) > MERGE_FAN_IN:
+        merged: List[Path] = []
+        for start in range(0, len(paths), MERGE_FAN_IN):
+            group = paths[start : start + MERGE_FAN_IN]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            out = _RunWriter(spill_dir, piece_size)
+            for batch in _merge([_read_run(p) for p in group]):
+                out.write(batch)
+            merged.append(out.close())
+        paths = merged
+
+    yield from _coalesce(_merge([_read_run(p) for p in paths]), chunksize)
+
+
+def _read_chunks(source, chunksize: int) -> Iterator[Batch]:
+    row_offset = 0
+    with pd.read_csv(source, dtype=TRADE_CSV_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            frame = validate_trade_frame(chunk, row_offset=row_offset)
+            book = TradeBook.from_frame(frame)
+            yield book, np.arange(row_offset, row_offset + len(book))
+            row_offset += len(chunk)
+
+
+def iter_trade_books(
+    source,
+    chunksize: int = config.DEFAULT_STREAM_CHUNKSIZE,
+    presorted: bool = False,
+    spill_dir: Optional[str | Path] = None,
+) -> Iterator[TradeBook]:
+    """Yield validated ``TradeBook`` batches in entry-time order.
+
+    With ``presorted=True`` chunks are passed straight through after a check
+    that they really are ordered (``ValueError`` otherwise); by default
+    chunks are sorted externally through temporary files in ``spill_dir``.
+    Validation errors are raised per chunk with file-wide row numbers.
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be positive")
+    chunks = _read_chunks(source, chunksize)
+
+    if presorted:
+        last_time: Optional[int] = None
+        for book, _ in chunks:
+            if not len(book):
+                continue
+            if np.any(np.diff(book.entry_time) < 0) or (last_time is not None and book.entry_time[0] < last_time):
+                raise ValueError("Trades are not ordered by entry_datetime; use presorted=False")
+            last_time = int(book.entry_time[-1])
+            yield book
+        return
+
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="trades-sort-") as tmp:
+        for book, _ in _external_sort(chunks, chunksize, Path(tmp)):
+            yield book
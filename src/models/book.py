@@ -0,0 +1,252 @@
+"""Columnar (struct-of-arrays) trade and result stores."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.models.trade import Trade, TradeResult
+
+LONG = 1
+SHORT = -1
+
+
+@dataclass(frozen=True)
+class Categorical:
+    """Integer codes into a shared array of labels (-1 marks a missing value)."""
+
+    codes: np.ndarray
+    categories: np.ndarray
+
+    @classmethod
+    def from_values(cls, values: Sequence[Optional[str]]) -> "Categorical":
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        categories = np.asarray([str(v) for v in uniques], dtype=str)
+        return cls(codes.astype(np.int32), categories)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, key) -> "Categorical":
+        return Categorical(self.codes[key], self.categories)
+
+    def values(self) -> List[Optional[str]]:
+        labels = self.categories.tolist()
+        return [labels[c] if c >= 0 else None for c in self.codes.tolist()]
+
+    def recode(self, categories: np.ndarray) -> "Categorical":
+        """Express the codes against a superset of categories."""
+        lookup = {label: i for i, label in enumerate(categories.tolist())}
+        mapping = np.asarray([lookup[label] for label in self.categories.tolist()] + [-1], dtype=np.int32)
+        return Categorical(mapping[self.codes], categories)
+
+
+def _concat_categoricals(parts: Sequence[Categorical]) -> Categorical:
+    labels: dict = {}
+    for part in parts:
+        for label in part.categories.tolist():
+            labels.setdefault(label, len(labels))
+    categories = np.asarray(list(labels), dtype=str)
+    return Categorical(np.concatenate([p.recode(categories).codes for p in parts]), categories)
+
+
+def _to_ns(values) -> np.ndarray:
+    return np.asarray(pd.to_datetime(values).to_numpy(dtype="datetime64[ns]")).view(np.int64)
+
+
+def _nan_to_none(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+
+@dataclass(frozen=True)
+class TradeBook:
+    """Trades stored column-wise.
+
+    Slicing (``book[a:b]``) returns views of every column; integer arrays and
+    boolean masks gather rows. Categorical columns share their labels with the
+    parent book. Missing stops/quantities are NaN, timestamps are int64 ns.
+    """
+
+    trade_id: np.ndarray
+    strategy: Categorical
+    instrument: Categorical
+    market: Categorical
+    entry_time: np.ndarray
+    exit_time: np.ndarray
+    direction: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    stop_price: np.ndarray
+    quantity: np.ndarray
+    comment: Categorical
+
+    def __len__(self) -> int:
+        return len(self.entry_price)
+
+    def __getitem__(self, key) -> "TradeBook":
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 if key != -1 else None)
+        return TradeBook(**{f.name: getattr(self, f.name)[key] for f in fields(self)})
+
+    @classmethod
+    def empty(cls) -> "TradeBook":
+        return cls.from_trades([])
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "TradeBook":
+        """Build from a frame returned by ``loader.validate_trade_frame``."""
+        side = frame["side"].to_numpy(dtype=object)
+        return cls(
+            trade_id=frame["trade_id"].to_numpy(dtype=str),
+            strategy=Categorical.from_values(frame["strategy_id"]),
+            instrument=Categorical.from_values(frame["instrument"]),
+            market=Categorical.from_values(frame["market"]),
+            entry_time=_to_ns(frame["entry_datetime"]),
+            exit_time=_to_ns(frame["exit_datetime"]),
+            direction=np.where(side == "LONG", LONG, SHORT).astype(np.int8),
+            entry_price=frame["entry_price"].to_numpy(dtype=float),
+            exit_price=frame["exit_price"].to_numpy(dtype=float),
+            stop_price=frame["stop_price"].to_numpy(dtype=float),
+            quantity=frame["quantity"].to_numpy(dtype=float),
+            comment=Categorical.from_values(frame["comment"]),
+        )
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[Trade]) -> "TradeBook":
+        def optional(values) -> np.ndarray:
+            return np.asarray([np.nan if v is None else v for v in values], dtype=float)
+
+        return cls(
+            trade_id=np.asarray([t.trade_id for t in trades], dtype=str),
+            strategy=Categorical.from_values([t.strategy_id for t in trades]),
+            instrument=Categorical.from_values([t.instrument for t in trades]),
+            market=Categorical.from_values([t.market for t in trades]),
+            entry_time=_to_ns([t.entry_datetime for t in trades]),
+            exit_time=_to_ns([t.exit_datetime for t in trades]),
+            direction=np.asarray([t.direction() for t in trades], dtype=np.int8),
+            entry_price=np.asarray([t.entry_price for t in trades], dtype=float),
+            exit_price=np.asarray([t.exit_price for t in trades], dtype=float),
+            stop_price=optional(t.stop_price for t in trades),
+            quantity=optional(t.quantity for t in trades),
+            comment=Categorical.from_values([t.comment for t in trades]),
+        )
+
+    @classmethod
+    def concat(cls, books: Sequence["TradeBook"]) -> "TradeBook":
+        """Stack books row-wise, merging categorical labels."""
+        if not books:
+            return cls.empty()
+        columns = {}
+        for f in fields(cls):
+            parts = [getattr(b, f.name) for b in books]
+            if isinstance(parts[0], Categorical):
+                columns[f.name] = _concat_categoricals(parts)
+            else:
+                columns[f.name] = np.concatenate(parts)
+        return cls(**columns)
+
+    def to_trades(self) -> List[Trade]:
+        columns = zip(
+            self.trade_id.tolist(),
+            self.strategy.values(),
+            self.instrument.values(),
+            self.market.values(),
+            pd.to_datetime(self.entry_time).tolist(),
+            pd.to_datetime(self.exit_time).tolist(),
+            ["LONG" if d == LONG else "SHORT" for d in self.direction.tolist()],
+            self.entry_price.tolist(),
+            self.exit_price.tolist(),
+            _nan_to_none(self.stop_price),
+            _nan_to_none(self.quantity),
+            self.comment.values(),
+        )
+        return [Trade(*values) for values in columns]
+
+    def entry_order(self) -> np.ndarray:
+        """Row order by entry time; ties keep their original order."""
+        return np.argsort(self.entry_time, kind="stable")
+
+    def sort_by_entry(self) -> "TradeBook":
+        order = self.entry_order()
+        if np.all(order[1:] > order[:-1]):
+            return self
+        return self[order]
+
+    @property
+    def has_stop(self) -> np.ndarray:
+        return ~np.isnan(self.stop_price)
+
+    @property
+    def per_unit_risk(self) -> np.ndarray:
+        """``abs(entry - stop)``, 0 where no stop is set."""
+        return np.where(self.has_stop, np.abs(self.entry_price - self.stop_price), 0.0)
+
+    @property
+    def price_move(self) -> np.ndarray:
+        """Signed per-unit profit: ``(exit - entry) * direction``."""
+        return (self.exit_price - self.entry_price) * self.direction
+
+    @property
+    def nbytes(self) -> int:
+        total = 0
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, Categorical):
+                total += value.codes.nbytes + value.categories.nbytes
+            else:
+                total += value.nbytes
+        return total
+
+
+@dataclass(frozen=True)
+class ResultBook:
+    """Simulation results stored column-wise, aligned row by row with ``trades``."""
+
+    trades: TradeBook
+    pnl: np.ndarray
+    risk_amount: np.ndarray
+    equity_before: np.ndarray
+    equity_after: np.ndarray
+    r_multiple: np.ndarray
+    f_risk: np.ndarray
+    portfolio_risk_sum: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def __getitem__(self, key) -> "ResultBook":
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 if key != -1 else None)
+        return ResultBook(**{f.name: getattr(self, f.name)[key] for f in fields(self)})
+
+    @classmethod
+    def from_results(cls, results: Sequence[TradeResult]) -> "ResultBook":
+        def column(name: str) -> np.ndarray:
+            return np.fromiter((getattr(r, name) for r in results), dtype=float, count=len(results))
+
+        return cls(
+            trades=TradeBook.from_trades([r.trade for r in results]),
+            pnl=column("pnl"),
+            risk_amount=column("risk_amount"),
+            equity_before=column("equity_before"),
+            equity_after=column("equity_after"),
+            r_multiple=column("r_multiple"),
+            f_risk=column("f_risk"),
+            portfolio_risk_sum=column("portfolio_risk_sum"),
+        )
+
+    def to_results(self) -> List[TradeResult]:
+        columns = zip(
+            self.trades.to_trades(),
+            self.pnl.tolist(),
+            self.risk_amount.tolist(),
+            self.equity_before.tolist(),
+            self.equity_after.tolist(),
+            self.r_multiple.tolist(),
+            self.f_risk.tolist(),
+            self.portfolio_risk_sum.tolist(),
+        )
+        return [TradeResult(*values) for values in columns]
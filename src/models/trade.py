@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     trade_id: str
     strategy_id: str
@@ -27,7 +27,7 @@ class Trade:
         return 1 if self.side.upper() == "LONG" else -1
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeResult:
     trade: Trade
     pnl: float
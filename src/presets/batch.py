@@ -0,0 +1,106 @@
+"""Evaluate many saved presets against one trade book and rank them.
+
+Presets are converted to settings and split into chunks; each chunk is one
+``run_sweep`` call (so closed-form presets share a single ``cumprod``) in a
+process pool that receives the trade book once per worker. The app runs
+it as a background job (``src.simulation.jobs``), so the Streamlit script
+never blocks on it.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from src import config
+from src.models.book import TradeBook
+from src.presets.manager import default_store, settings_from_preset
+from src.presets.store import PresetStore
+from src.simulation.engine import SimulationSettings
+from src.simulation.jobs import Progress
+from src.simulation.sweep import METRIC_COLUMNS, run_sweep
+
+# Sort direction per ranking metric (True = larger is better).
+RANK_DESCENDING = {"cagr": True, "final_equity": True, "max_drawdown": True, "max_dd_duration": False}
+
+_worker_book: Optional[TradeBook] = None
+
+
+def _init_worker(book: TradeBook) -> None:
+    global _worker_book
+    _worker_book = book
+
+
+def _evaluate_in_worker(grid: List[SimulationSettings], years: float) -> pd.DataFrame:
+    return run_sweep(_worker_book, grid, years)
+
+
+def evaluate_presets(
+    book: TradeBook,
+    base: SimulationSettings,
+    names: Optional[Iterable[str]] = None,
+    sizing_mode: Optional[str] = None,
+    pattern: Optional[str] = None,
+    years: float = 1.0,
+    rank_by: str = "cagr",
+    workers: Optional[int] = None,
+    store: Optional[PresetStore] = None,
+    progress: Optional[Progress] = None,
+) -> pd.DataFrame:
+    """Metrics of every matching preset on ``book``, best first.
+
+    ``names`` / ``sizing_mode`` / ``pattern`` (name substring) filter the
+    presets; all saved presets are used by default. ``base`` fills keys a
+    preset lacks. The result has a ``preset`` and a ``rank`` column in
+    front of the sweep's settings and metric columns. ``progress`` is called
+    after every chunk with the presets done and a ranking of those so far.
+    """
+    if rank_by not in RANK_DESCENDING:
+        raise ValueError(f"Cannot rank by {rank_by}; choose one of {', '.join(RANK_DESCENDING)}")
+    records = (store or default_store()).records(names, sizing_mode, pattern)
+    if not records:
+        return pd.DataFrame(columns=["rank", "preset", *METRIC_COLUMNS])
+    preset_names = list(records)
+    grid = [settings_from_preset(records[name], base) for name in preset_names]
+    size = config.PRESETS_PER_TASK
+    chunks = [grid[i : i + size] for i in range(0, len(grid), size)]
+
+    parts: List[pd.DataFrame] = []
+
+    def collect(part: pd.DataFrame) -> None:
+        parts.append(part)
+        if progress is not None:
+            done = min(len(parts) * size, len(grid))
+            progress(done, len(grid), lambda k=len(parts): _ranked(parts[:k], preset_names, rank_by))
+
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            collect(run_sweep(book, chunk, years))
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(config.WORKER_START_METHOD),
+            initializer=_init_worker,
+            initargs=(book,),
+        )
+        try:
+            futures = [pool.submit(_evaluate_in_worker, chunk, years) for chunk in chunks]
+            for future in futures:
+                collect(future.result())
+        finally:
+            pool.shutdown(cancel_futures=True)
+    return _ranked(parts, preset_names, rank_by)
+
+
+def _ranked(parts: List[pd.DataFrame], preset_names: List[str], rank_by: str) -> pd.DataFrame:
+    """Ranking table of the evaluated chunks (the first presets in order)."""
+    table = pd.concat(parts, ignore_index=True)
+    table.insert(0, "preset", preset_names[: len(table)])
+    table = table.sort_values(rank_by, ascending=not RANK_DESCENDING[rank_by], kind="stable", ignore_index=True)
+    table.insert(0, "rank", range(1, len(table) + 1))
+    return table
@@ -1,12 +1,23 @@
-"""Simple JSON-based preset storage."""
+"""Preset storage API used by the app, backed by ``PresetStore``.
+
+Presets used to be one JSON file each under ``PRESET_DIR``; those files are
+imported into the SQLite store the first time it is created.
+"""
 
 from __future__ import annotations
 
 import json
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from src import config
+from src.presets.store import PresetStore, parse_preset, safe_name
+from src.risk.sizing import PositionSizingParams
+from src.simulation.engine import SimulationSettings
+
+_store: Optional[PresetStore] = None
+_legacy_import_errors: Dict[str, str] = {}
 
 
 def _preset_dir() -> Path:
@@ -15,30 +26,74 @@ def _preset_dir() -> Path:
     return path
 
 
+def default_store() -> PresetStore:
+    """Process-wide store; legacy JSON presets are imported when the database is new.
+
+    Legacy files that fail to import are skipped (see ``legacy_import_errors``).
+    """
+    global _store
+    if _store is None:
+        is_new = not Path(config.PRESET_DB_PATH).exists()
+        store = PresetStore(config.PRESET_DB_PATH)
+        if is_new:
+            _, failed = store.import_json(_preset_dir())
+            _legacy_import_errors.update(failed)
+        _store = store
+    return _store
+
+
+def legacy_import_errors() -> Dict[str, str]:
+    """``{file name: error}`` of legacy JSON presets skipped by the first-run import."""
+    return dict(_legacy_import_errors)
+
+
 def preset_path(name: str) -> Path:
-    safe_name = name.replace("/", "_").replace("\\", "_")
-    return _preset_dir() / f"{safe_name}.json"
+    """Location of a preset's JSON export."""
+    return _preset_dir() / f"{safe_name(name)}.json"
 
 
 def list_presets() -> List[str]:
-    return [p.stem for p in _preset_dir().glob("*.json")]
+    return default_store().names()
 
 
 def save_preset(name: str, data: Dict) -> None:
-    path = preset_path(name)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    default_store().save(name, data)
 
 
 def load_preset(name: str) -> Dict:
-    path = preset_path(name)
-    if not path.exists():
-        raise FileNotFoundError(f"Preset not found: {name}")
-    with path.open(encoding="utf-8") as f:
-        return json.load(f)
+    return default_store().load(name)
 
 
 def delete_preset(name: str) -> None:
-    path = preset_path(name)
-    if path.exists():
-        path.unlink()
+    default_store().delete(name)
+
+
+def export_preset(name: str) -> str:
+    """JSON text of a preset, as the old one-file-per-preset format."""
+    return json.dumps(load_preset(name), ensure_ascii=False, indent=2)
+
+
+def import_preset(name: str, text: str | bytes) -> None:
+    """Save JSON text as a preset; ``ValueError`` if it is not a JSON object."""
+    save_preset(name, parse_preset(text))
+
+
+def preset_from_settings(settings: SimulationSettings) -> Dict:
+    return {
+        "initial_equity": settings.initial_equity,
+        "max_portfolio_risk": settings.max_portfolio_risk,
+        "overlap_mode": settings.overlap_mode,
+        "sizing_mode": settings.sizing_mode,
+        "params": asdict(settings.sizing_params),
+    }
+
+
+def settings_from_preset(data: Dict, base: SimulationSettings) -> SimulationSettings:
+    """Settings described by a preset; keys it lacks fall back to defaults or ``base``."""
+    return SimulationSettings(
+        initial_equity=data.get("initial_equity", config.DEFAULT_INITIAL_EQUITY),
+        sizing_mode=data.get("sizing_mode", base.sizing_mode),
+        sizing_params=PositionSizingParams(**data.get("params", {})),
+        max_portfolio_risk=data.get("max_portfolio_risk", config.DEFAULT_MAX_PORTFOLIO_RISK),
+        overlap_mode=data.get("overlap_mode", base.overlap_mode),
+    )
@@ -0,0 +1,144 @@
+"""Indexed preset storage in a single SQLite file.
+
+Each preset is one row: the JSON document as saved plus a few columns
+pulled out of it (sizing mode, overlap mode, update time) and indexed, so
+listing and filtering hundreds of presets is one query instead of a
+directory glob and a file read per preset. JSON files remain the exchange
+format for import and export.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    name TEXT PRIMARY KEY,
+    sizing_mode TEXT,
+    overlap_mode TEXT,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presets_sizing_mode ON presets (sizing_mode);
+CREATE INDEX IF NOT EXISTS presets_updated_at ON presets (updated_at);
+"""
+
+
+def safe_name(name: str) -> str:
+    """File-system safe form of a preset name (used for JSON export)."""
+    return name.replace("/", "_").replace("\\", "_")
+
+
+def parse_preset(text: str | bytes) -> Dict:
+    """Preset document from JSON text; ``ValueError`` unless it is a JSON object."""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Preset JSON must be an object, not {type(data).__name__}")
+    return data
+
+
+class PresetStore:
+    """Presets keyed by name in one SQLite database."""
+
+    def __init__(self, path: str | Path = config.PRESET_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: Streamlit reruns and the
+        # background evaluation may use the store from different threads.
+        return sqlite3.connect(self.path, timeout=10)
+
+    def save(self, name: str, data: Dict) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO presets (name, sizing_mode, overlap_mode, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                (
+                    name,
+                    data.get("sizing_mode"),
+                    data.get("overlap_mode"),
+                    datetime.now().isoformat(timespec="seconds"),
+                    json.dumps(data, ensure_ascii=False),
+                ),
+            )
+
+    def load(self, name: str) -> Dict:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM presets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Preset not found: {name}")
+        return json.loads(row[0])
+
+    def delete(self, name: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM presets WHERE name = ?", (name,))
+
+    def _select(self, columns: str, names: Optional[Iterable[str]], sizing_mode: Optional[str], pattern: Optional[str]):
+        clauses, args = [], []
+        if names is not None:
+            names = list(names)
+            clauses.append(f"name IN ({', '.join('?' * len(names))})" if names else "0")
+            args += names
+        if sizing_mode:
+            clauses.append("sizing_mode = ?")
+            args.append(sizing_mode)
+        if pattern:
+            clauses.append("instr(lower(name), lower(?)) > 0")  # literal substring, no LIKE wildcards
+            args.append(pattern)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT {columns} FROM presets{where} ORDER BY name", args).fetchall()
+
+    def names(self, sizing_mode: Optional[str] = None, pattern: Optional[str] = None) -> List[str]:
+        """Preset names, optionally filtered by sizing mode and a name substring."""
+        return [row[0] for row in self._select("name", None, sizing_mode, pattern)]
+
+    def records(
+        self,
+        names: Optional[Iterable[str]] = None,
+        sizing_mode: Optional[str] = None,
+        pattern: Optional[str] = None,
+    ) -> Dict[str, Dict]:
+        """``{name: data}`` for the matching presets, in one query."""
+        return {name: json.loads(data) for name, data in self._select("name, data", names, sizing_mode, pattern)}
+
+    def index(self) -> List[Dict]:
+        """Indexed metadata of every preset (no JSON decoding)."""
+        rows = self._select("name, sizing_mode, overlap_mode, updated_at", None, None, None)
+        return [dict(zip(("name", "sizing_mode", "overlap_mode", "updated_at"), row)) for row in rows]
+
+    def import_json(self, path: str | Path) -> Tuple[List[str], Dict[str, str]]:
+        """Import one ``<name>.json`` file or every JSON file in a directory.
+
+        Unreadable or invalid files are skipped; returns the imported names
+        and ``{file name: error}`` for the skipped files.
+        """
+        path = Path(path)
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        imported, failed = [], {}
+        for file in files:
+            try:
+                data = parse_preset(file.read_bytes())
+            except (OSError, ValueError) as exc:
+                failed[file.name] = str(exc)
+                continue
+            self.save(file.stem, data)
+            imported.append(file.stem)
+        return imported, failed
+
+    def export_json(self, name: str, directory: str | Path) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{safe_name(name)}.json"
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.load(name), f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,107 @@
+"""Metrics per strategy, instrument or market from one simulation.
+
+Rows are stably sorted by the group's categorical code, so every group is a
+contiguous segment still in simulation order. Sums and counts come from
+``bincount`` on the codes, per-group extremes from ``reduceat`` on the
+segment starts, and the running peak / underwater count of each group's
+curve from grouped ``cummax`` / ``cumsum``. The cost does not depend on the
+number of groups.
+
+A group's equity curve is its contribution: the initial equity plus the
+cumulative PnL of the group's own trades, as sized in the full simulation.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.models.book import Categorical, ResultBook
+from src.risk.metrics import cagr_array
+
+GROUP_DIMENSIONS = ("strategy", "instrument", "market")
+MISSING_LABEL = "(未設定)"
+BREAKDOWN_COLUMNS = [
+    "trade_count",
+    "win_rate",
+    "total_pnl",
+    "avg_pnl",
+    "avg_pnl_pct",
+    "avg_r",
+    "max_drawdown",
+    "max_dd_duration",
+    "final_equity",
+    "cagr",
+    "max_portfolio_risk",
+]
+
+
+def _group_codes(column: Categorical) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes with missing values moved to their own trailing label."""
+    codes = column.codes.astype(np.int64)
+    labels = column.categories.astype(object)
+    if np.any(codes < 0):
+        codes = np.where(codes < 0, len(labels), codes)
+        labels = np.append(labels, MISSING_LABEL)
+    return codes, labels
+
+
+def grouped_metrics(results: ResultBook, by: str, initial_equity: float, years: float = 1.0) -> pd.DataFrame:
+    """``compute_metrics`` scalars for every value of ``by`` (one row per group)."""
+    if by not in GROUP_DIMENSIONS:
+        raise ValueError(f"Unknown group dimension: {by}")
+    if not len(results):
+        return pd.DataFrame(columns=["group", *BREAKDOWN_COLUMNS])
+    codes, labels = _group_codes(getattr(results.trades, by))
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.concatenate([[True], sorted_codes[1:] != sorted_codes[:-1]]))
+    ends = np.concatenate([starts[1:], [len(order)]]) - 1
+    groups = sorted_codes[starts]
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, weights=values, minlength=len(labels))[groups]
+
+    count = np.bincount(codes, minlength=len(labels))[groups]
+    pnl = results.pnl[order]
+    by_code = pd.Series(sorted_codes)
+    equity = initial_equity + pd.Series(pnl).groupby(by_code).cumsum().to_numpy()
+    peaks = pd.Series(equity).groupby(by_code).cummax().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = (equity - peaks) / peaks
+    underwater = equity < peaks
+    # Underwater run length, reset at each new peak of the group (cf. metrics._drawdown).
+    run = pd.Series(underwater.astype(np.int64)).groupby(by_code).cumsum().to_numpy()
+    durations = run - pd.Series(np.where(underwater, 0, run)).groupby(by_code).cummax().to_numpy()
+
+    total_pnl = total(results.pnl)
+    avg_pnl = total_pnl / count
+    final_equity = equity[ends]
+    return pd.DataFrame(
+        {
+            "group": labels[groups],
+            "trade_count": count,
+            "win_rate": total((results.pnl > 0).astype(float)) / count,
+            "total_pnl": total_pnl,
+            "avg_pnl": avg_pnl,
+            "avg_pnl_pct": avg_pnl / initial_equity if initial_equity > 0 else np.zeros(len(groups)),
+            "avg_r": total(results.r_multiple) / count,
+            "max_drawdown": np.minimum.reduceat(drawdowns, starts),
+            "max_dd_duration": np.maximum.reduceat(durations, starts),
+            "final_equity": final_equity,
+            "cagr": cagr_array(initial_equity, final_equity, years),
+            "max_portfolio_risk": np.maximum.reduceat(results.portfolio_risk_sum[order], starts),
+        }
+    )
+
+
+def breakdown(
+    results: ResultBook,
+    initial_equity: float,
+    years: float = 1.0,
+    dimensions: Sequence[str] = GROUP_DIMENSIONS,
+) -> Dict[str, pd.DataFrame]:
+    """``grouped_metrics`` for each dimension of the same simulation."""
+    return {by: grouped_metrics(results, by, initial_equity, years) for by in dimensions}
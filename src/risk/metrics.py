@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 
+from src.models.book import ResultBook
 from src.models.trade import TradeResult
 
 
@@ -14,24 +15,28 @@ from src.models.trade import TradeResult
 class DrawdownStats:
     max_drawdown: float
     max_duration: int
-    drawdown_series: List[float]
+    drawdown_series: Optional[np.ndarray]
 
 
-def _drawdown(equity_curve: List[float]) -> DrawdownStats:
+def _drawdown(equity_curve: np.ndarray, series: bool = True) -> DrawdownStats:
+    """Max drawdown and longest underwater run of one equity curve.
+
+    The run length resets at every new peak: the running count of underwater
+    trades minus its value at the latest peak (carried forward with
+    ``maximum.accumulate``) gives the current run without a Python loop.
+    """
+    equity_curve = np.asarray(equity_curve, dtype=float)
+    if not equity_curve.size:
+        return DrawdownStats(0.0, 0, np.empty(0) if series else None)
     peaks = np.maximum.accumulate(equity_curve)
     drawdowns = (equity_curve - peaks) / peaks
-    durations = []
-    duration = 0
-    for equity, peak in zip(equity_curve, peaks):
-        if equity < peak:
-            duration += 1
-        else:
-            duration = 0
-        durations.append(duration)
+    underwater = equity_curve < peaks
+    count = np.cumsum(underwater)
+    durations = count - np.maximum.accumulate(np.where(underwater, 0, count))
     return DrawdownStats(
-        max_drawdown=float(drawdowns.min()) if len(drawdowns) else 0.0,
-        max_duration=int(max(durations)) if durations else 0,
-        drawdown_series=drawdowns.tolist(),
+        max_drawdown=float(drawdowns.min()),
+        max_duration=int(durations.max()),
+        drawdown_series=drawdowns if series else None,
     )
 
 
@@ -41,39 +46,91 @@ def _cagr(initial_equity: float, final_equity: float, years: float) -> float:
     return (final_equity / initial_equity) ** (1 / years) - 1
 
 
-def compute_metrics(
-    results: List[TradeResult], initial_equity: float, years: float = 1.0
+def curve_drawdowns(equity: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Max drawdown and longest underwater run along the last axis.
+
+    Batched version of ``_drawdown`` for a stack of equity curves (one per
+    row); the duration uses the index of the latest peak instead of a loop.
+    """
+    equity = np.asarray(equity, dtype=float)
+    if equity.shape[-1] == 0:
+        shape = equity.shape[:-1]
+        return np.zeros(shape), np.zeros(shape, dtype=np.int64)
+    peaks = np.maximum.accumulate(equity, axis=-1)
+    max_dd = ((equity - peaks) / peaks).min(axis=-1)
+    idx = np.arange(equity.shape[-1])
+    last_peak = np.maximum.accumulate(np.where(equity < peaks, 0, idx), axis=-1)
+    return max_dd, (idx - last_peak).max(axis=-1)
+
+
+def cagr_array(initial_equity, final_equity, years: float) -> np.ndarray:
+    """Vectorized ``_cagr``; paths that end at or below zero report -100%."""
+    initial = np.asarray(initial_equity, dtype=float)
+    final = np.asarray(final_equity, dtype=float)
+    if years <= 0:
+        return np.zeros(np.broadcast(initial, final).shape)
+    ratio = np.divide(final, initial, out=np.zeros(np.broadcast(initial, final).shape), where=initial > 0)
+    growth = np.power(np.maximum(ratio, 0.0), 1 / years) - 1
+    return np.where(initial > 0, growth, 0.0)
+
+
+def metrics_from_arrays(
+    pnl: np.ndarray,
+    r_multiple: np.ndarray,
+    equity_after: np.ndarray,
+    portfolio_risk_sum: np.ndarray,
+    initial_equity: float,
+    years: float = 1.0,
+    series: bool = True,
 ) -> dict:
-    """Aggregate performance statistics."""
-    trade_count = len(results)
-    pnl_values = np.array([r.pnl for r in results], dtype=float)
-    r_values = np.array([r.r_multiple for r in results], dtype=float)
-    equity_curve = [r.equity_after for r in results]
-
-    wins = (pnl_values > 0).sum()
-    total_pnl = float(pnl_values.sum())
-    avg_pnl = float(pnl_values.mean()) if trade_count else 0.0
-    avg_pnl_pct = avg_pnl / initial_equity if initial_equity > 0 else 0.0
-    avg_r = float(r_values.mean()) if trade_count else 0.0
+    """``compute_metrics`` on plain arrays, one vectorized pass per statistic.
 
-    dd = _drawdown(equity_curve) if equity_curve else DrawdownStats(0.0, 0, [])
-    final_equity = equity_curve[-1] if equity_curve else initial_equity
+    With ``series=False`` the equity and drawdown series are left out, which
+    is all Monte Carlo and sweeps need.
+    """
+    trade_count = len(pnl)
+    avg_pnl = float(pnl.mean()) if trade_count else 0.0
+    dd = _drawdown(equity_after, series)
+    final_equity = float(equity_after[-1]) if trade_count else initial_equity
 
-    portfolio_risks = np.array([r.portfolio_risk_sum for r in results], dtype=float)
-    max_portfolio_risk = float(portfolio_risks.max()) if portfolio_risks.size else 0.0
-
-    return {
+    metrics = {
         "trade_count": trade_count,
-        "win_rate": wins / trade_count if trade_count else 0.0,
-        "total_pnl": total_pnl,
+        "win_rate": int(np.count_nonzero(pnl > 0)) / trade_count if trade_count else 0.0,
+        "total_pnl": float(pnl.sum()),
         "avg_pnl": avg_pnl,
-        "avg_pnl_pct": avg_pnl_pct,
-        "avg_r": avg_r,
+        "avg_pnl_pct": avg_pnl / initial_equity if initial_equity > 0 else 0.0,
+        "avg_r": float(r_multiple.mean()) if trade_count else 0.0,
         "max_drawdown": dd.max_drawdown,
         "max_dd_duration": dd.max_duration,
-        "drawdown_series": dd.drawdown_series,
         "final_equity": final_equity,
         "cagr": _cagr(initial_equity, final_equity, years),
-        "max_portfolio_risk": max_portfolio_risk,
-        "equity_curve": equity_curve,
+        "max_portfolio_risk": float(portfolio_risk_sum.max()) if portfolio_risk_sum.size else 0.0,
     }
+    if series:
+        metrics["drawdown_series"] = dd.drawdown_series
+        metrics["equity_curve"] = np.asarray(equity_after, dtype=float)
+    return metrics
+
+
+def compute_metrics(
+    results: Union[List[TradeResult], ResultBook], initial_equity: float, years: float = 1.0, series: bool = True
+) -> dict:
+    """Aggregate performance statistics.
+
+    ``equity_curve`` and ``drawdown_series`` are NumPy arrays and are only
+    included when ``series`` is true.
+    """
+    if not isinstance(results, ResultBook):
+        columns = np.array(
+            [(r.pnl, r.r_multiple, r.equity_after, r.portfolio_risk_sum) for r in results], dtype=float
+        ).reshape(-1, 4)
+        return metrics_from_arrays(*columns.T, initial_equity, years, series)
+    return metrics_from_arrays(
+        results.pnl,
+        results.r_multiple,
+        results.equity_after,
+        results.portfolio_risk_sum,
+        initial_equity,
+        years,
+        series,
+    )
@@ -0,0 +1,159 @@
+"""Growth-optimal risk fraction (empirical Kelly / optimal f) from R-multiples.
+
+Risking a fraction ``f`` of equity per 1R turns a trade with R-multiple
+``R`` into the equity factor ``1 + f * R``. The expected log-growth per
+trade ``G(f) = mean(log(1 + f * R))`` is concave, so its maximum is the
+single root of ``G'(f) = mean(R / (1 + f * R))``, found with a safeguarded
+Newton iteration (bisection whenever a step leaves the bracket). A
+histogram of R gives the starting point, so the full data set is only
+touched for a couple of polishing steps. Optionally the fraction is capped
+so that replaying the trades in their actual order stays within a maximum
+drawdown.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.optimize import brentq
+
+from src.risk.markov_ruin import r_distribution
+from src.risk.sizing import PositionSizingMode, PositionSizingParams
+from src.simulation.engine import SimulationSettings
+
+F_CAP = 1.0  # search limit when no trade loses (growth would be unbounded)
+COMPRESS_BINS = 1024
+NEWTON_MAX_ITER = 50
+NEWTON_TOL = 1e-10
+DRAWDOWN_XTOL = 1e-6  # relative to the unconstrained optimum
+
+
+@dataclass(frozen=True)
+class OptimalF:
+    f: float  # recommended fraction (drawdown-capped when a limit was given)
+    kelly_f: float  # unconstrained maximizer of expected log-growth
+    growth: float  # expected log-growth per trade at ``f``
+    kelly_growth: float
+    f_max: float  # largest f keeping 1 + f * R > 0 for every trade (inf if none lose)
+    curve_f: np.ndarray  # growth curve around the optimum, for plotting
+    curve_growth: np.ndarray
+    max_drawdown: Optional[float] = None  # in-order max drawdown at ``f`` when constrained
+
+    def settings(self, base: SimulationSettings, safety: float = 1.0) -> SimulationSettings:
+        """Fixed-fractional settings risking ``safety * f`` per trade."""
+        return replace(
+            base,
+            sizing_mode=PositionSizingMode.FIXED_FRACTIONAL,
+            sizing_params=PositionSizingParams(f=safety * self.f),
+        )
+
+
+def log_growth(r_multiples: np.ndarray, f, weights: Optional[np.ndarray] = None):
+    """Expected ``log(1 + f * R)`` for a scalar f or an array of f values."""
+    f_arr = np.atleast_1d(np.asarray(f, dtype=float))
+    change = f_arr[:, None] * r_multiples[None, :]
+    ruined = change <= -1.0
+    logs = np.log1p(np.where(ruined, 0.0, change))
+    logs[ruined] = -np.inf
+    values = np.average(logs, axis=1, weights=weights)
+    return values if np.ndim(f) else float(values[0])
+
+
+def _derivatives(r: np.ndarray, f: float, weights: Optional[np.ndarray]) -> Tuple[float, float]:
+    """``G'(f)`` and ``G''(f)`` in one pass."""
+    q = r / (1.0 + f * r)
+    if weights is None:
+        return float(q.mean()), -float(np.dot(q, q)) / len(q)
+    return float(np.dot(weights, q)), -float(np.dot(weights, q * q))
+
+
+def _newton_root(r: np.ndarray, weights: Optional[np.ndarray], lo: float, hi: float, start: float) -> float:
+    """Root of the decreasing ``G'`` in ``(lo, hi)``; Newton steps kept inside the bracket."""
+    f = min(max(start, lo), hi)
+    for _ in range(NEWTON_MAX_ITER):
+        d1, d2 = _derivatives(r, f, weights)
+        if d1 > 0:
+            lo = f
+        else:
+            hi = f
+        step = d1 / d2 if d2 < 0 else math.inf
+        candidate = f - step
+        if not lo < candidate < hi:
+            candidate = 0.5 * (lo + hi)
+        if abs(candidate - f) <= NEWTON_TOL * max(1.0, f) or hi - lo <= NEWTON_TOL:
+            return candidate
+        f = candidate
+    return f
+
+
+def _compress(r: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Binned R for the starting point and the curve; the worst loss stays exact."""
+    values, weights = r_distribution(r, bins=COMPRESS_BINS)
+    values[0] = r.min()  # the domain limit 1 + f * min(R) > 0 must not move
+    return values, weights
+
+
+def max_drawdown_in_order(r_multiples: np.ndarray, f: float) -> float:
+    """Max drawdown (as a positive fraction) replaying the trades in order at ``f``."""
+    change = f * r_multiples
+    if change.min() <= -1.0:
+        return 1.0
+    log_equity = np.cumsum(np.log1p(change, out=change), out=change)
+    peaks = np.maximum.accumulate(log_equity)
+    np.maximum(peaks, 0.0, out=peaks)  # the starting equity is the first peak
+    return float(-np.expm1(np.min(log_equity - peaks)))
+
+
+def optimal_f(
+    r_multiples: np.ndarray,
+    max_drawdown: Optional[float] = None,
+    curve_points: int = 41,
+) -> OptimalF:
+    """Maximize expected log-growth over ``f`` for the given R-multiples.
+
+    With ``max_drawdown`` (a positive fraction such as 0.2) the result is the
+    largest ``f`` up to the growth optimum whose in-order drawdown stays
+    within the limit. The growth curve spans ``[0, 2 * kelly_f]`` (clipped
+    to the valid domain) and is evaluated on binned R values.
+    """
+    r = np.asarray(r_multiples, dtype=float)
+    r = r[np.isfinite(r)]
+    if not len(r):
+        raise ValueError("No R-multiples to optimize over")
+    worst = float(r.min())
+    f_max = -1.0 / worst if worst < 0 else math.inf
+    hi = min(f_max * (1 - 1e-9), F_CAP)
+
+    values, weights = _compress(r)
+    if r.mean() <= 0:
+        kelly = 0.0
+    elif hi == F_CAP and _derivatives(r, hi, None)[0] >= 0:
+        kelly = hi  # growth still rising at the search limit
+    else:
+        guess = _newton_root(values, weights, 0.0, hi, 0.0)
+        kelly = _newton_root(r, None, 0.0, hi, guess)
+
+    f = kelly
+    drawdown = None
+    if max_drawdown is not None and kelly > 0:
+        drawdown = max_drawdown_in_order(r, kelly)
+        if drawdown > max_drawdown:
+            f = brentq(lambda x: max_drawdown_in_order(r, x) - max_drawdown, 0.0, kelly, xtol=DRAWDOWN_XTOL * kelly)
+            drawdown = max_drawdown_in_order(r, f)
+
+    span = min(2 * kelly, hi) if kelly > 0 else min(0.05, hi)
+    curve_f = np.linspace(0.0, span, curve_points)
+    kelly_growth = log_growth(r, kelly)
+    return OptimalF(
+        f=f,
+        kelly_f=kelly,
+        growth=kelly_growth if f == kelly else log_growth(r, f),
+        kelly_growth=kelly_growth,
+        f_max=f_max,
+        curve_f=curve_f,
+        curve_growth=log_growth(values, curve_f, weights),
+        max_drawdown=drawdown,
+    )
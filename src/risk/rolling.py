@@ -0,0 +1,121 @@
+"""Rolling performance metrics over the last N trades or the last N days.
+
+Trades are ordered by ``exit_datetime`` (the time a result is known) and
+every row gets the metrics of the window ending at it, in O(n) overall:
+
+- win rate, average R and profit factor from prefix sums (window sum = two lookups)
+- drawdown against the highest realized equity inside the window, from a
+  monotonic deque of candidate peaks
+- rolling max drawdown, the worst of those drawdowns inside the window, from a
+  second deque
+
+Window starts only move forward, so each row enters and leaves a deque at
+most once, for count and time windows alike.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.models.book import ResultBook
+
+
+@dataclass(frozen=True)
+class RollingMetrics:
+    """One row per trade in exit order; each value describes the window ending there."""
+
+    exit_time: np.ndarray  # ns since epoch
+    trade_count: np.ndarray  # trades in the window
+    win_rate: np.ndarray
+    avg_r: np.ndarray
+    profit_factor: np.ndarray  # NaN while the window has no losing trade
+    equity: np.ndarray  # realized equity after the trade
+    drawdown: np.ndarray  # vs. the window's highest equity (<= 0)
+    max_drawdown: np.ndarray  # worst ``drawdown`` within the window (<= 0)
+
+    def __len__(self) -> int:
+        return len(self.exit_time)
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame({f.name: getattr(self, f.name) for f in fields(self)})
+        frame["exit_time"] = pd.to_datetime(frame["exit_time"])
+        return frame
+
+
+def window_starts(exit_time: np.ndarray, trades: Optional[int] = None, days: Optional[float] = None) -> np.ndarray:
+    """First row of the window ending at each row (rows sorted by exit time)."""
+    if (trades is None) == (days is None):
+        raise ValueError("Specify exactly one of trades or days")
+    idx = np.arange(len(exit_time))
+    if trades is not None:
+        return np.maximum(idx - max(int(trades), 1) + 1, 0)
+    span = int(days * config.NS_PER_DAY)
+    return np.searchsorted(exit_time, exit_time - span, side="right")
+
+
+def _window_sum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    prefix = np.concatenate([[0.0], np.cumsum(values, dtype=float)])
+    return prefix[1:] - prefix[starts]
+
+
+def _rolling_extreme(values: list, starts: list, largest: bool) -> np.ndarray:
+    """Sliding max (or min) for nondecreasing window starts, with a monotonic deque."""
+    out = np.empty(len(values))
+    window: deque = deque()  # indices whose values are monotonic from the front
+    for i, value in enumerate(values):
+        if largest:
+            while window and values[window[-1]] <= value:
+                window.pop()
+        else:
+            while window and values[window[-1]] >= value:
+                window.pop()
+        window.append(i)
+        while window[0] < starts[i]:
+            window.popleft()
+        out[i] = values[window[0]]
+    return out
+
+
+def rolling_metrics(results: ResultBook, trades: Optional[int] = None, days: Optional[float] = None) -> RollingMetrics:
+    """Rolling metrics over the last ``trades`` trades or the last ``days`` days.
+
+    Equity is realized in exit order: the first trade's starting equity plus
+    the cumulative PnL of everything closed so far.
+    """
+    order = np.argsort(results.trades.exit_time, kind="stable")
+    exit_time = results.trades.exit_time[order]
+    pnl = results.pnl[order]
+    r_multiple = results.r_multiple[order]
+    starts = window_starts(exit_time, trades, days)
+    count = np.arange(1, len(order) + 1) - starts
+
+    wins = _window_sum(pnl > 0, starts)
+    gross_profit = _window_sum(np.maximum(pnl, 0.0), starts)
+    gross_loss = _window_sum(np.maximum(-pnl, 0.0), starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.nan)
+
+    start_equity = float(results.equity_before[0]) if len(results) else 0.0
+    equity = start_equity + np.cumsum(pnl)
+    starts_list = starts.tolist()
+    peaks = _rolling_extreme(equity.tolist(), starts_list, largest=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(peaks > 0, equity / peaks - 1.0, 0.0)
+    max_drawdown = _rolling_extreme(drawdown.tolist(), starts_list, largest=False)
+
+    return RollingMetrics(
+        exit_time=exit_time,
+        trade_count=count,
+        win_rate=wins / count,
+        avg_r=_window_sum(r_multiple, starts) / count,
+        profit_factor=profit_factor,
+        equity=equity,
+        drawdown=drawdown,
+        max_drawdown=max_drawdown,
+    )
@@ -1,8 +1,15 @@
-"""Approximate risk of ruin calculations (Balsara-like)."""
+"""Risk of ruin: Balsara-like approximation and an empirical Monte Carlo estimate."""
 
 from __future__ import annotations
 
-from typing import Iterable, List, Tuple
+import math
+from statistics import NormalDist
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src import config
+from src.models.book import TradeBook
 
 
 def risk_of_ruin(p: float, payoff_ratio: float, f: float, ruin_threshold: float = 0.1) -> float:
@@ -16,12 +23,19 @@ def risk_of_ruin(p: float, payoff_ratio: float, f: float, ruin_threshold: float
     """
     p = max(min(p, 1.0), 0.0)
     payoff_ratio = max(payoff_ratio, 0.0)
-    if f <= 0 or payoff_ratio == 0:
+    if f <= 0 or payoff_ratio == 0 or ruin_threshold >= 1:
         return 1.0
     edge = p * payoff_ratio - (1 - p)
     if edge <= 0:
         return 1.0
-    k = ruin_threshold / f
+    if f >= 1:
+        k = 1.0  # one loss wipes the account out
+    elif ruin_threshold <= 0:
+        return 0.0  # losing a fraction f of equity never reaches zero
+    else:
+        # Losses in a row (each costing f of equity) that take equity from
+        # the start down to ruin_threshold of it.
+        k = math.log(ruin_threshold) / math.log(1 - f)
     base = (1 - edge) / (1 + edge)
     base = max(min(base, 1.0), 0.0)
     return base ** k
@@ -30,3 +44,89 @@ def risk_of_ruin(p: float, payoff_ratio: float, f: float, ruin_threshold: float
 def ruin_table(p: float, payoff_ratio: float, f_values: Iterable[float], ruin_threshold: float = 0.1) -> List[Tuple[float, float]]:
     """Return list of (f, risk_of_ruin)."""
     return [(f, risk_of_ruin(p, payoff_ratio, f, ruin_threshold)) for f in f_values]
+
+
+def trade_r_multiples(book: TradeBook) -> np.ndarray:
+    """Per-trade R (price move / stop distance) for trades with a stop."""
+    per_unit = book.per_unit_risk
+    staked = per_unit > 0
+    return book.price_move[staked] / per_unit[staked]
+
+
+def wilson_interval(successes: np.ndarray, n: int, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval for binomial proportions."""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p_hat = np.asarray(successes, dtype=float) / n
+    denominator = 1 + z * z / n
+    center = (p_hat + z * z / (2 * n)) / denominator
+    half = z * np.sqrt(p_hat * (1 - p_hat) / n + z * z / (4 * n * n)) / denominator
+    return np.maximum(center - half, 0.0), np.minimum(center + half, 1.0)
+
+
+def empirical_ruin_table(
+    r_multiples: np.ndarray,
+    f_values: Iterable[float],
+    ruin_threshold: float = 0.1,
+    n_paths: int = 5_000,
+    n_trades: Optional[int] = None,
+    seed: Optional[int] = None,
+    confidence: float = 0.95,
+    block_trades: int = 64,
+) -> List[Tuple[float, float, float, float]]:
+    """Monte Carlo risk of ruin from observed R-multiples.
+
+    Each path draws ``n_trades`` R values with replacement (default: as many
+    as observed) and compounds ``equity *= 1 + f * R``; a path is ruined once
+    equity falls to ``ruin_threshold`` of the start or below, the event
+    ``risk_of_ruin`` and ``markov_ruin_table`` estimate too. All f values
+    share the same draws and are advanced together ``block_trades`` trades
+    at a time over the still-alive (f, path) pairs, so ruined pairs stop
+    costing work; pairs are processed in chunks of at most
+    ``MONTE_CARLO_MAX_CHUNK_CELLS`` pairs x trades to bound memory. Returns
+    ``(f, risk_of_ruin, ci_low, ci_high)`` per f with a Wilson interval at
+    ``confidence``; NaN when there are no R values.
+    """
+    f_values = np.asarray(list(f_values), dtype=float)
+    r_multiples = np.asarray(r_multiples, dtype=float)
+    if not len(r_multiples) or n_paths <= 0:
+        return [(float(f), math.nan, math.nan, math.nan) for f in f_values]
+    horizon = n_trades if n_trades and n_trades > 0 else len(r_multiples)
+    rng = np.random.default_rng(seed)
+
+    # Alive (f, path) pairs, flattened; equity is relative to the start.
+    pair_f = np.repeat(f_values, n_paths)
+    pair_path = np.tile(np.arange(n_paths), len(f_values))
+    pair_id = np.arange(len(pair_f))
+    equity = np.ones(len(pair_f))
+    ruined = equity <= ruin_threshold  # a threshold of 1 or more is ruin from the start
+    pair_f, pair_path, pair_id, equity = pair_f[~ruined], pair_path[~ruined], pair_id[~ruined], equity[~ruined]
+
+    for start in range(0, horizon, block_trades):
+        width = min(block_trades, horizon - start)
+        draws = r_multiples[rng.integers(0, len(r_multiples), size=(n_paths, width))]
+        if not len(pair_id):
+            continue  # keep drawing so the stream does not depend on which pairs died
+        hit = np.empty(len(pair_id), dtype=bool)
+        last = np.empty(len(pair_id))
+        rows = max(1, config.MONTE_CARLO_MAX_CHUNK_CELLS // width)
+        for lo in range(0, len(pair_id), rows):
+            chunk = slice(lo, lo + rows)
+            growth = draws[pair_path[chunk]]
+            growth *= pair_f[chunk, None]
+            growth += 1.0
+            np.maximum(growth, 0.0, out=growth)
+            np.cumprod(growth, axis=1, out=growth)
+            growth *= equity[chunk, None]
+            hit[chunk] = np.any(growth <= ruin_threshold, axis=1)
+            last[chunk] = growth[:, -1]
+        ruined[pair_id[hit]] = True
+        alive = ~hit
+        pair_f, pair_path, pair_id = pair_f[alive], pair_path[alive], pair_id[alive]
+        equity = last[alive]
+
+    counts = ruined.reshape(len(f_values), n_paths).sum(axis=1)
+    low, high = wilson_interval(counts, n_paths, confidence)
+    return [
+        (float(f), float(c / n_paths), float(lo), float(hi))
+        for f, c, lo, hi in zip(f_values, counts, low, high)
+    ]
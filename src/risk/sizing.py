@@ -1,9 +1,20 @@
-"""Position sizing utilities."""
+"""Position sizing utilities.
+
+Scalar functions size one trade per call. The ``*_array`` kernels size any
+number of positions at once from arrays of equity, entry and stop prices
+(NaN stop = no stop), with run-constant inputs such as the Kelly fraction
+computed once per call; they give the same numbers as the scalar
+functions element for element.
+"""
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+Sizer = Callable[[float, float, Optional[float]], Tuple[float, float]]
 
 
 class PositionSizingMode:
@@ -28,14 +39,20 @@ def _per_unit_risk(entry_price: float, stop_price: Optional[float]) -> float:
     return abs(entry_price - stop_price)
 
 
-def fixed_fractional(
-    equity: float,
-    entry_price: float,
-    stop_price: Optional[float],
-    params: PositionSizingParams,
-) -> Tuple[float, float]:
-    """Return quantity and risk_amount for fixed fractional sizing."""
-    f = params.f or 0.0
+def kelly_fraction(params: PositionSizingParams) -> float:
+    """Safety-scaled Kelly fraction ``max(f* * safety, 0)``; constant for a run."""
+    p = params.p or 0.0
+    expected_r = params.expected_r or 0.0
+    safety = params.safety_coefficient or 0.0
+    denominator = expected_r - p + 1
+    if denominator == 0:
+        f_star = 0
+    else:
+        f_star = (expected_r * p) / denominator
+    return max(f_star * safety, 0.0)
+
+
+def _fixed_fractional(equity: float, entry_price: float, stop_price: Optional[float], f: float) -> Tuple[float, float]:
     risk_amount = equity * f
     per_unit = _per_unit_risk(entry_price, stop_price)
     if per_unit <= 0:
@@ -46,6 +63,16 @@ def fixed_fractional(
     return quantity, risk_amount
 
 
+def fixed_fractional(
+    equity: float,
+    entry_price: float,
+    stop_price: Optional[float],
+    params: PositionSizingParams,
+) -> Tuple[float, float]:
+    """Return quantity and risk_amount for fixed fractional sizing."""
+    return _fixed_fractional(equity, entry_price, stop_price, params.f or 0.0)
+
+
 def fractional_kelly(
     equity: float,
     entry_price: float,
@@ -53,21 +80,7 @@ def fractional_kelly(
     params: PositionSizingParams,
 ) -> Tuple[float, float]:
     """Use Kelly formula (fractional) then delegate to fixed fractional logic."""
-    p = params.p or 0.0
-    expected_r = params.expected_r or 0.0
-    safety = params.safety_coefficient or 0.0
-    denominator = expected_r - p + 1
-    if denominator == 0:
-        f_star = 0
-    else:
-        f_star = (expected_r * p) / denominator
-    f_safe = max(f_star * safety, 0.0)
-    return fixed_fractional(
-        equity,
-        entry_price,
-        stop_price,
-        PositionSizingParams(f=f_safe),
-    )
+    return _fixed_fractional(equity, entry_price, stop_price, kelly_fraction(params))
 
 
 def fixed_lot(
@@ -99,3 +112,79 @@ def compute_position_size(
     if mode == PositionSizingMode.FIXED_LOT:
         return fixed_lot(equity, entry_price, stop_price, params)
     return fixed_fractional(equity, entry_price, stop_price, params)
+
+
+def position_sizer(mode: str, params: PositionSizingParams) -> Sizer:
+    """Resolve the mode and run-constant fractions once for a per-trade loop.
+
+    The returned callable takes ``(equity, entry_price, stop_price)`` and
+    matches ``compute_position_size(mode, ..., params)``.
+    """
+    if mode == PositionSizingMode.FIXED_LOT:
+        return lambda equity, entry_price, stop_price: fixed_lot(equity, entry_price, stop_price, params)
+    f = kelly_fraction(params) if mode == PositionSizingMode.FRACTIONAL_KELLY else params.f or 0.0
+    return lambda equity, entry_price, stop_price: _fixed_fractional(equity, entry_price, stop_price, f)
+
+
+def _per_unit_risk_array(entry_price: np.ndarray, stop_price: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(stop_price), 0.0, np.abs(entry_price - stop_price))
+
+
+def fixed_fractional_array(
+    equity: np.ndarray, entry_price: np.ndarray, stop_price: np.ndarray, f: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of ``fixed_fractional`` for a risk fraction ``f``.
+
+    Inputs broadcast against each other; ``f`` may also be an array (one
+    fraction per position or per row of a batch).
+    """
+    equity, entry_price, stop_price = (np.asarray(a, dtype=float) for a in (equity, entry_price, stop_price))
+    risk_amount = equity * np.asarray(f, dtype=float)
+    per_unit = _per_unit_risk_array(entry_price, stop_price)
+    staked = per_unit > 0
+    positive_entry = entry_price > 0
+    quantity = np.where(
+        staked,
+        np.maximum(risk_amount / np.where(staked, per_unit, 1.0), 0.0),
+        np.where(positive_entry, risk_amount / np.where(positive_entry, entry_price, 1.0), 0.0),
+    )
+    return quantity, np.where(staked, risk_amount, quantity * per_unit)
+
+
+def fractional_kelly_array(
+    equity: np.ndarray, entry_price: np.ndarray, stop_price: np.ndarray, params: PositionSizingParams
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of ``fractional_kelly``; the Kelly fraction is computed once."""
+    return fixed_fractional_array(equity, entry_price, stop_price, kelly_fraction(params))
+
+
+def fixed_lot_array(
+    equity: np.ndarray, entry_price: np.ndarray, stop_price: np.ndarray, params: PositionSizingParams
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of ``fixed_lot`` (equity only sets the output shape)."""
+    equity, entry_price, stop_price = (np.asarray(a, dtype=float) for a in (equity, entry_price, stop_price))
+    shape = np.broadcast_shapes(equity.shape, entry_price.shape, stop_price.shape)
+    entry_price = np.broadcast_to(entry_price, shape)
+    if params.fixed_quantity is not None:
+        quantity = np.full(shape, float(params.fixed_quantity or 0.0))
+    elif params.fixed_notional is not None:
+        positive_entry = entry_price > 0
+        quantity = np.where(positive_entry, params.fixed_notional / np.where(positive_entry, entry_price, 1.0), 0.0)
+    else:
+        quantity = np.zeros(shape)
+    return quantity, _per_unit_risk_array(entry_price, stop_price) * quantity
+
+
+def compute_position_sizes(
+    mode: str,
+    equity: np.ndarray,
+    entry_price: np.ndarray,
+    stop_price: np.ndarray,
+    params: PositionSizingParams,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Array form of ``compute_position_size``: one dispatch for all positions."""
+    if mode == PositionSizingMode.FRACTIONAL_KELLY:
+        return fractional_kelly_array(equity, entry_price, stop_price, params)
+    if mode == PositionSizingMode.FIXED_LOT:
+        return fixed_lot_array(equity, entry_price, stop_price, params)
+    return fixed_fractional_array(equity, entry_price, stop_price, params.f or 0.0)
@@ -3,10 +3,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Iterable, Iterator, List
 
+import numpy as np
+
+from src.models.book import ResultBook, TradeBook
 from src.models.trade import Trade, TradeResult
-from src.risk.sizing import PositionSizingMode, PositionSizingParams, compute_position_size
+from src.risk.sizing import PositionSizingMode, PositionSizingParams, compute_position_size, position_sizer
+from src.simulation.overlap import OverlapMode, simulate_overlapping
+from src.simulation.vectorized import simulate_vectorized
+
+
+class SimulationEngine:
+    AUTO = "auto"
+    VECTORIZED = "vectorized"
+    LOOP = "loop"
 
 
 @dataclass
@@ -15,6 +26,7 @@ class SimulationSettings:
     sizing_mode: str
     sizing_params: PositionSizingParams
     max_portfolio_risk: float
+    overlap_mode: str = OverlapMode.SEQUENTIAL
 
 
 def simulate(trades: List[Trade], settings: SimulationSettings) -> List[TradeResult]:
@@ -67,3 +79,104 @@ def simulate(trades: List[Trade], settings: SimulationSettings) -> List[TradeRes
         equity = equity_after
 
     return results
+
+
+def simulate_book(book: TradeBook, settings: SimulationSettings, engine: str = SimulationEngine.AUTO) -> ResultBook:
+    """Columnar counterpart of ``simulate``: same per-trade rules, array in/out.
+
+    ``AUTO`` uses the closed-form NumPy path when the sizing mode allows it
+    and falls back to the per-trade loop otherwise; ``VECTORIZED`` raises
+    ``ValueError`` instead of falling back. Settings with an overlap mode
+    other than ``SEQUENTIAL`` always use the event-driven engine.
+    """
+    if settings.overlap_mode != OverlapMode.SEQUENTIAL:
+        return simulate_overlapping(book, settings)
+    book = book.sort_by_entry()
+    if engine != SimulationEngine.LOOP:
+        results = simulate_vectorized(book, settings)
+        if results is not None:
+            return results
+        if engine == SimulationEngine.VECTORIZED:
+            raise ValueError("These trades/settings are not supported by the vectorized engine")
+    return _simulate_sorted(book, settings, settings.initial_equity)
+
+
+def simulate_sequence(book: TradeBook, settings: SimulationSettings) -> ResultBook:
+    """Per-trade loop over ``book`` in the given row order (no entry-time sort).
+
+    Used for resampled paths, where the drawn order is the point.
+    """
+    return _simulate_sorted(book, settings, settings.initial_equity)
+
+
+def simulate_stream(batches: Iterable[TradeBook], settings: SimulationSettings) -> Iterator[ResultBook]:
+    """Simulate entry-ordered batches one at a time, carrying equity across them.
+
+    Batches must already be in entry-time order (as produced by
+    ``streaming.iter_trade_books``); an out-of-order batch raises ``ValueError``.
+    """
+    equity = settings.initial_equity
+    last_entry = None
+    for book in batches:
+        if not len(book):
+            continue
+        if np.any(np.diff(book.entry_time) < 0) or (last_entry is not None and book.entry_time[0] < last_entry):
+            raise ValueError("Trade batches must be ordered by entry_datetime")
+        results = _simulate_sorted(book, settings, equity)
+        equity = float(results.equity_after[-1])
+        last_entry = book.entry_time[-1]
+        yield results
+
+
+def _simulate_sorted(book: TradeBook, settings: SimulationSettings, equity: float) -> ResultBook:
+    n = len(book)
+    pnl = np.empty(n)
+    risk = np.empty(n)
+    before = np.empty(n)
+    after = np.empty(n)
+    r_mult = np.empty(n)
+    f_risk = np.empty(n)
+    size = position_sizer(settings.sizing_mode, settings.sizing_params)
+
+    columns = zip(
+        book.entry_price.tolist(),
+        book.exit_price.tolist(),
+        book.stop_price.tolist(),
+        book.quantity.tolist(),
+        book.direction.tolist(),
+    )
+    for i, (entry_price, exit_price, stop_price, quantity, direction) in enumerate(columns):
+        stop = None if stop_price != stop_price else stop_price
+        equity_before = equity
+        qty, risk_amount = size(equity_before, entry_price, stop)
+        if quantity == quantity:
+            qty = quantity
+            if stop is not None:
+                risk_amount = abs(entry_price - stop) * qty
+
+        risk_pct = (risk_amount / equity_before) if equity_before > 0 else 0.0
+        if settings.max_portfolio_risk and risk_pct > settings.max_portfolio_risk > 0:
+            scale = settings.max_portfolio_risk / risk_pct
+            qty *= scale
+            risk_amount *= scale
+            risk_pct = settings.max_portfolio_risk
+
+        trade_pnl = (exit_price - entry_price) * qty * direction
+        equity = equity_before + trade_pnl
+        pnl[i] = trade_pnl
+        risk[i] = risk_amount
+        before[i] = equity_before
+        after[i] = equity
+        r_mult[i] = (trade_pnl / risk_amount) if risk_amount else 0.0
+        f_risk[i] = risk_pct
+
+    return ResultBook(
+        trades=book,
+        pnl=pnl,
+        risk_amount=risk,
+        equity_before=before,
+        equity_after=after,
+        r_multiple=r_mult,
+        f_risk=f_risk,
+        portfolio_risk_sum=f_risk.copy(),
+    )
@@ -0,0 +1,170 @@
+"""Background jobs with progress, partial results and cancellation.
+
+Long computations (Monte Carlo, preset evaluation) are submitted to a shared
+thread pool instead of running inside the Streamlit script, so reruns neither
+block on them nor restart them. Each session keeps a ``JobRegistry`` (in
+``st.session_state``) that maps a slot name to its latest ``Job``; a rerun
+looks the job up again and shows its progress or result.
+
+A job function receives ``progress=job.report`` (a ``Progress`` callback).
+``report`` records the progress and a snapshot of the partial result, and
+raises ``JobCancelled`` once ``cancel()`` was called, which unwinds the run at
+its next chunk. Process pools used by the job itself (Monte Carlo and preset
+``workers``) are shut down by that unwinding.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src import config
+
+
+# Progress callback: ``progress(done, total, snapshot)``, where ``snapshot()``
+# builds the partial result so far. Long computations call it from the
+# running thread after every chunk; it may raise to abort the run.
+Progress = Callable[[int, int, Callable[[], Any]], None]
+
+
+class JobCancelled(Exception):
+    """Raised from ``Job.report`` once the job has been cancelled."""
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class Job:
+    """One submitted computation and what is known about it so far."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = 0
+        self.total = 0
+        self._snapshot: Optional[Callable[[], Any]] = None
+        self._partial: Optional[tuple] = None  # (snapshot, value) of the last partial() call
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+
+    def report(self, done: int, total: int, snapshot: Optional[Callable[[], Any]] = None) -> None:
+        """Progress callback for the job function."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+        with self._lock:
+            self.done, self.total = done, total
+            if snapshot is not None:
+                self._snapshot = snapshot
+
+    def cancel(self) -> None:
+        """Stop the job at its next progress report (or before it starts)."""
+        self._cancel.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def status(self) -> str:
+        future = self._future
+        if future is None or not future.done():
+            return JobStatus.RUNNING if future is not None and future.running() else JobStatus.PENDING
+        if future.cancelled() or isinstance(future.exception(), JobCancelled):
+            return JobStatus.CANCELLED
+        return JobStatus.FAILED if future.exception() is not None else JobStatus.DONE
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.CANCELLED, JobStatus.FAILED)
+
+    @property
+    def fraction(self) -> float:
+        """Share of the work reported done, in [0, 1]."""
+        if self.status == JobStatus.DONE:
+            return 1.0
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.submitted_at
+
+    def result(self) -> Optional[Any]:
+        """Final result once done, else None."""
+        return self._future.result() if self.status == JobStatus.DONE else None
+
+    def error(self) -> Optional[BaseException]:
+        return self._future.exception() if self.status == JobStatus.FAILED else None
+
+    def partial(self) -> Optional[Any]:
+        """Result over the work done at the last progress report (None before the first)."""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if self._partial is None or self._partial[0] is not snapshot:
+            self._partial = (snapshot, snapshot())
+        return self._partial[1]
+
+
+def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    try:
+        if job._cancel.is_set():
+            raise JobCancelled(job.name)
+        return fn(*args, progress=job.report, **kwargs)
+    finally:
+        job.finished_at = time.time()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def default_executor() -> ThreadPoolExecutor:
+    """Process-wide pool running the jobs of every session."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.BACKGROUND_JOB_WORKERS, thread_name_prefix="job")
+    return _executor
+
+
+class JobRegistry:
+    """Jobs of one session by slot name; submitting to a taken slot cancels its job."""
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self._executor = executor
+        self._jobs: Dict[str, Job] = {}
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, description: str = "", **kwargs) -> Job:
+        """Run ``fn(*args, progress=..., **kwargs)`` in the background as slot ``name``."""
+        self.cancel(name)
+        job = Job(name, description)
+        job._future = (self._executor or default_executor()).submit(_run, job, fn, args, kwargs)
+        self._jobs[name] = job
+        return job
+
+    def get(self, name: str) -> Optional[Job]:
+        return self._jobs.get(name)
+
+    def cancel(self, name: str) -> None:
+        job = self._jobs.get(name)
+        if job is not None and not job.finished:
+            job.cancel()
+
+    def discard(self, name: str) -> None:
+        """Cancel and forget a slot's job."""
+        self.cancel(name)
+        self._jobs.pop(name, None)
+
+    def running(self) -> List[Job]:
+        return [job for job in self._jobs.values() if not job.finished]
+
+    def cancel_all(self) -> None:
+        for job in self.running():
+            job.cancel()
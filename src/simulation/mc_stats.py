@@ -0,0 +1,213 @@
+"""Constant-memory summaries of Monte Carlo outcomes.
+
+Each accumulator is fed batches of per-path values and can be merged with
+another one built from different paths, so statistics over any number of
+paths fit in a fixed budget:
+
+- ``RunningMoments``: count, mean, variance (Chan et al. pairwise update), min, max
+- ``QuantileSketch``: KLL-style compactor sketch, rank error about ``1.7 / k``
+- ``FixedHistogram``: fixed bin edges plus under/overflow counts
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RunningMoments:
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # sum of squared deviations from the mean
+    min: float = math.inf
+    max: float = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size:
+            batch_mean = float(values.mean())
+            batch = RunningMoments(
+                values.size,
+                batch_mean,
+                float(np.square(values - batch_mean).sum()),
+                float(values.min()),
+                float(values.max()),
+            )
+            self.merge(batch)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with KLL compactors.
+
+    Level ``h`` holds items of weight ``2**h``. A level over capacity is
+    sorted and every other item (random offset) is promoted to the next
+    level, so memory stays ``O(k)`` however many values are added.
+    """
+
+    def __init__(self, k: int = 1024, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                promoted = items[odd + int(self._rng.integers(2)) :: 2]
+                self._levels[level] = items[:odd]
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self.count += values.size
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def quantile(self, q):
+        """Value at probability ``q`` (scalar or array); NaN when empty."""
+        items = np.concatenate(self._levels)
+        if not items.size:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else math.nan
+        weights = np.concatenate([np.full(len(level), 2.0**h) for h, level in enumerate(self._levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.clip(np.asarray(q, dtype=float), 0.0, 1.0) * cumulative[-1]
+        pos = np.minimum(np.searchsorted(cumulative, ranks, side="left"), len(items) - 1)
+        result = items[order][pos]
+        return result if np.ndim(q) else float(result)
+
+    @property
+    def size(self) -> int:
+        """Items currently stored."""
+        return sum(len(items) for items in self._levels)
+
+
+@dataclass
+class FixedHistogram:
+    low: float
+    high: float
+    bins: int = 50
+    counts: Optional[np.ndarray] = None
+    underflow: int = 0
+    overflow: int = 0
+
+    def __post_init__(self):
+        if self.high <= self.low:
+            self.high = self.low + 1.0
+        if self.counts is None:
+            self.counts = np.zeros(self.bins, dtype=np.int64)
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        scaled = (values - self.low) * (self.bins / (self.high - self.low))
+        self.underflow += int(np.count_nonzero(scaled < 0))
+        self.overflow += int(np.count_nonzero(scaled > self.bins))
+        inside = scaled[(scaled >= 0) & (scaled <= self.bins)]
+        self.counts += np.bincount(np.minimum(inside.astype(np.int64), self.bins - 1), minlength=self.bins)
+
+    def merge(self, other: "FixedHistogram") -> None:
+        if (other.low, other.high, other.bins) != (self.low, self.high, self.bins):
+            raise ValueError("Histograms with different bins cannot be merged")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+
+class MetricStats:
+    """Moments, quantile sketch and histogram of one Monte Carlo metric.
+
+    Without ``value_range`` the histogram range is fixed from the first
+    batch, widened by half its span on each side; later values outside it
+    land in under/overflow. Stats meant to be merged need a shared range.
+    """
+
+    def __init__(self, bins: int = 50, sketch_k: int = 1024, value_range: Optional[Tuple[float, float]] = None):
+        self.bins = bins
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(sketch_k)
+        self.histogram = FixedHistogram(*value_range, bins) if value_range else None
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if not values.size:
+            return
+        if self.histogram is None:
+            low, high = float(values.min()), float(values.max())
+            pad = 0.5 * (high - low) or max(abs(low) * 0.5, 1e-12)
+            self.histogram = FixedHistogram(low - pad, high + pad, self.bins)
+        self.moments.update(values)
+        self.sketch.update(values)
+        self.histogram.update(values)
+
+    def merge(self, other: "MetricStats") -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        if self.histogram is None:
+            self.histogram = other.histogram
+        elif other.histogram is not None:
+            self.histogram.merge(other.histogram)
+
+    def quantile_interval(self, q: float, confidence: float = 0.95) -> Tuple[float, float, float]:
+        """``(estimate, low, high)`` for the ``q`` quantile.
+
+        Distribution-free interval from the binomial ranks of the order
+        statistics (normal approximation), read off the sketch.
+        """
+        n = self.count
+        if not n:
+            return math.nan, math.nan, math.nan
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        half = z * math.sqrt(q * (1 - q) / n)
+        estimate, low, high = self.sketch.quantile(np.array([q, q - half, q + half]))
+        return float(estimate), float(low), float(high)
@@ -2,12 +2,30 @@
 
 from __future__ import annotations
 
+import copy
+import itertools
+import math
+import multiprocessing
+import os
 import random
-from typing import Dict, List, Optional
+import secrets
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
+
+from src import config
+from src.models.book import TradeBook
 from src.models.trade import Trade
-from src.risk.metrics import compute_metrics
-from src.simulation.engine import SimulationSettings, simulate
+from src.risk.metrics import cagr_array, compute_metrics
+from src.simulation.engine import SimulationSettings, simulate, simulate_book, simulate_sequence
+from src.simulation.jobs import Progress
+from src.simulation.mc_stats import MetricStats
+from src.simulation.overlap import OverlapMode
+from src.simulation.resampling import Resampling, day_units, expand_units, unit_indices
+from src.simulation.vectorized import GrowthModel, growth_model
 
 
 def _sample_trades(trades: List[Trade], n_trades: Optional[int]) -> List[Trade]:
@@ -32,7 +50,7 @@ def run_monte_carlo(
     for _ in range(n_sims):
         sampled_trades = _sample_trades(trades, n_trades)
         results = simulate(sampled_trades, settings)
-        metrics = compute_metrics(results, settings.initial_equity)
+        metrics = compute_metrics(results, settings.initial_equity, series=False)
         final_equities.append(metrics["final_equity"])
         cagrs.append(metrics["cagr"])
         max_dds.append(metrics["max_drawdown"])
@@ -42,3 +60,443 @@ def run_monte_carlo(
         "cagrs": cagrs,
         "max_drawdowns": max_dds,
     }
+
+
+def _path_equity(model: GrowthModel, idx: np.ndarray, initial_equity: float, cap: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Equity matrix for drawn paths and a mask of paths needing the loop engine."""
+    equity = model.steps[idx]
+    if model.multiplicative:
+        equity += 1.0
+        np.cumprod(equity, axis=1, out=equity)
+        equity *= initial_equity
+        return equity, np.any(equity <= 0, axis=1)
+    np.cumsum(equity, axis=1, out=equity)
+    equity += initial_equity
+    exact = np.any(equity <= 0, axis=1)
+    if cap and cap > 0:
+        before = np.concatenate([np.full((len(idx), 1), initial_equity), equity[:, :-1]], axis=1)
+        exact |= np.any(model.risk[idx] > cap * before, axis=1)
+    return equity, exact
+
+
+def _max_drawdowns(equity: np.ndarray) -> np.ndarray:
+    """Row-wise max drawdown, without the duration pass ``curve_drawdowns`` adds."""
+    peaks = np.maximum.accumulate(equity, axis=1)
+    ratio = np.divide(equity, peaks, out=peaks)
+    return ratio.min(axis=1) - 1.0
+
+
+def _retimed(book: TradeBook, rows: np.ndarray, units: Optional[Tuple[np.ndarray, np.ndarray]]) -> TradeBook:
+    """Rows of ``book`` with synthetic times that follow the drawn order.
+
+    Overlap modes simulate in entry-time order, so a path keeps its order
+    only on a timeline of its own: the k-th drawn unit (a trade, or a
+    calendar day when ``units`` is given) moves to the start of the k-th
+    unit of the entry-sorted source, continuing past its end one source span
+    at a time. Trades keep their offset from their unit's start and their
+    holding time, so overlaps within a day survive.
+    """
+    path = book[rows]
+    if not len(rows):
+        return path
+    if units is None:
+        unit_start = book.entry_time
+        unit_of_row = rows
+        position = np.arange(len(rows))
+    else:
+        starts, _ = units
+        unit_start = book.entry_time[starts] // config.NS_PER_DAY * config.NS_PER_DAY
+        unit_of_row = np.searchsorted(starts, rows, side="right") - 1
+        # A drawn day ends where the day changes or its rows stop running on
+        # (the same day drawn twice in a row restarts at its first row).
+        new_unit = np.ones(len(rows), dtype=bool)
+        new_unit[1:] = (unit_of_row[1:] != unit_of_row[:-1]) | (rows[1:] != rows[:-1] + 1)
+        position = np.cumsum(new_unit) - 1
+    n_units = len(unit_start)
+    span = int(unit_start[-1] - unit_start[0]) + config.NS_PER_DAY
+    shift = unit_start[position % n_units] + (position // n_units) * span - unit_start[unit_of_row]
+    return replace(path, entry_time=path.entry_time + shift, exit_time=path.exit_time + shift)
+
+
+def _exact_path(
+    book: TradeBook,
+    settings: SimulationSettings,
+    idx: np.ndarray,
+    units: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    rows = idx[idx < len(book)]
+    if settings.overlap_mode != OverlapMode.SEQUENTIAL:
+        return simulate_book(_retimed(book, rows, units), settings).equity_after
+    return simulate_sequence(book[rows], settings).equity_after
+
+
+@dataclass(frozen=True)
+class _PathJob:
+    """Everything a worker needs to evaluate paths; sent once per process."""
+
+    book: TradeBook
+    settings: SimulationSettings
+    model: Optional[GrowthModel]
+    n_trades: Optional[int]
+    resampling: Resampling
+    units: Optional[Tuple[np.ndarray, np.ndarray]]  # calendar-day (starts, counts) when by_day
+    fan_columns: Optional[np.ndarray] = None  # path steps sampled for percentile fan bands
+
+
+# Equity quantiles drawn as fan bands (outer band, inner band, median).
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# A substream: an independent seed and the number of paths drawn from it.
+Stream = Tuple[np.random.SeedSequence, int]
+
+
+def _stream_plan(n_sims: int, seed: Optional[int]) -> Tuple[int, List[Stream]]:
+    """Split ``n_sims`` into fixed-size blocks with spawned child seeds.
+
+    The split depends only on ``n_sims``, so the paths drawn are the same
+    however the blocks are later grouped into chunks or spread over workers.
+    """
+    if seed is None:
+        seed = secrets.randbits(32)  # short enough to type back into the UI
+    root = np.random.SeedSequence(seed)
+    block = config.MONTE_CARLO_STREAM_PATHS
+    sizes = [min(block, n_sims - start) for start in range(0, n_sims, block)]
+    return root.entropy, list(zip(root.spawn(len(sizes)), sizes))
+
+
+def _group_streams(streams: List[Stream], chunk_size: int) -> List[List[Stream]]:
+    groups: List[List[Stream]] = []
+    current: List[Stream] = []
+    count = 0
+    for stream in streams:
+        if current and count + stream[1] > chunk_size:
+            groups.append(current)
+            current, count = [], 0
+        current.append(stream)
+        count += stream[1]
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _draw_indices(rng: np.random.Generator, job: _PathJob, n_paths: int) -> np.ndarray:
+    """Source rows of ``n_paths`` paths; by-day paths are padded with ``len(job.book)``."""
+    if job.units is None:
+        return unit_indices(rng, job.resampling, len(job.book), n_paths, job.n_trades)
+    starts, counts = job.units
+    days = unit_indices(rng, job.resampling, len(starts), n_paths, job.n_trades)
+    return expand_units(days, starts, counts, pad=len(job.book))
+
+
+def _evaluate_streams(
+    job: _PathJob, streams: List[Stream]
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Final equity, max drawdown and (float32) fan samples for every path of the given substreams."""
+    n_source = len(job.book)
+    n_paths = sum(n for _, n in streams)
+    if n_source == 0:
+        fan = None if job.fan_columns is None else np.full((n_paths, len(job.fan_columns)), job.settings.initial_equity)
+        return np.full(n_paths, job.settings.initial_equity), np.zeros(n_paths), fan
+    draws = [_draw_indices(np.random.default_rng(ss), job, n) for ss, n in streams]
+    width = max(d.shape[1] for d in draws)
+    idx = np.concatenate([np.pad(d, ((0, 0), (0, width - d.shape[1])), constant_values=n_source) for d in draws])
+    settings = job.settings
+    if job.model is not None:
+        equity, exact = _path_equity(job.model, idx, settings.initial_equity, settings.max_portfolio_risk)
+    else:
+        equity, exact = np.empty(idx.shape), np.ones(len(idx), dtype=bool)
+    for row in np.flatnonzero(exact):
+        path = _exact_path(job.book, settings, idx[row], job.units)
+        equity[row, : len(path)] = path
+        equity[row, len(path) :] = path[-1] if len(path) else settings.initial_equity  # padding
+    fan = None if job.fan_columns is None else equity[:, job.fan_columns].astype(np.float32)
+    return equity[:, -1].copy(), _max_drawdowns(equity), fan
+
+
+_worker_job: Optional[_PathJob] = None
+
+
+def _init_worker(job: _PathJob) -> None:
+    global _worker_job
+    _worker_job = job
+
+
+def _evaluate_in_worker(streams: List[Stream]) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    return _evaluate_streams(_worker_job, streams)
+
+
+def _prepare_job(
+    book: TradeBook,
+    settings: SimulationSettings,
+    n_trades: Optional[int],
+    chunk_size: Optional[int],
+    resampling: Optional[Resampling],
+    fan_points: int = 0,
+) -> Tuple[_PathJob, int]:
+    book = book.sort_by_entry()
+    n_trades = n_trades if n_trades and n_trades > 0 else None
+    resampling = resampling or Resampling()
+    units = day_units(book.entry_time) if resampling.by_day else None
+    n_units = len(units[0]) if units is not None else len(book)
+    path_len = n_trades or n_units
+    if units is not None and n_units:
+        path_len = int(np.ceil(path_len * len(book) / n_units))  # expected trades per path
+    if chunk_size is None:
+        chunk_size = max(1, config.MONTE_CARLO_MAX_CHUNK_CELLS // max(path_len, 1))
+    model = growth_model(book, settings) if settings.overlap_mode == OverlapMode.SEQUENTIAL else None
+    if model is not None and units is not None:
+        # Padding rows index one past the end: a step that leaves equity unchanged.
+        model = GrowthModel(model.multiplicative, np.append(model.steps, 0.0), np.append(model.risk, 0.0))
+    fan_columns = None
+    if fan_points and units is None and path_len:
+        fan_columns = np.unique(np.linspace(0, path_len - 1, fan_points).round().astype(np.int64))
+    return _PathJob(book, settings, model, n_trades, resampling, units, fan_columns), chunk_size
+
+
+def _iter_parts(
+    job: _PathJob, chunks: List[List[Stream]], workers: Optional[int]
+) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """Evaluate chunks in order, keeping at most ``2 * workers`` in flight.
+
+    Closing the iterator early cancels chunks that have not started.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield _evaluate_streams(job, chunk)
+        return
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(config.WORKER_START_METHOD),
+        initializer=_init_worker,
+        initargs=(job,),
+    )
+    try:
+        remaining = iter(chunks)
+        pending = deque(pool.submit(_evaluate_in_worker, chunk) for chunk in itertools.islice(remaining, 2 * workers))
+        while pending:
+            part = pending.popleft().result()
+            pending.extend(pool.submit(_evaluate_in_worker, chunk) for chunk in itertools.islice(remaining, 1))
+            yield part
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def run_monte_carlo_parallel(
+    book: TradeBook,
+    settings: SimulationSettings,
+    n_sims: int = 100,
+    n_trades: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    years: float = 1.0,
+    resampling: Optional[Resampling] = None,
+    fan_points: int = 0,
+    progress: Optional[Progress] = None,
+) -> Dict[str, np.ndarray]:
+    """Vectorized Monte Carlo spread over a process pool.
+
+    Paths are split into blocks of ``MONTE_CARLO_STREAM_PATHS``, each drawn
+    from its own ``SeedSequence.spawn`` child, and blocks are grouped into
+    chunks of at most ``chunk_size`` paths for the workers. Workers receive
+    the trades once and return only per-path final equity and max drawdown.
+    For a given ``seed`` the output is bit-identical for any ``workers`` and
+    ``chunk_size``; with ``seed=None`` fresh entropy is drawn and returned
+    under ``"seed"`` so the run can be reproduced.
+
+    ``resampling`` picks how paths are drawn (see ``resampling.py``); the
+    default shuffles all trades, or draws ``n_trades`` IID when given. With
+    ``by_day`` the units are calendar days and ``n_trades`` counts days.
+
+    With ``fan_points`` the equity of every path is also sampled at that many
+    evenly spaced trades and reduced to ``FAN_QUANTILES`` per trade:
+    ``"fan_trades"`` (trade numbers) and ``"fan_bands"`` (quantiles x
+    trades). Not available with ``by_day``, whose paths differ in length.
+
+    ``progress`` is called after every chunk with the paths done so far and
+    a snapshot of the result over them (see ``Progress``).
+    """
+    job, chunk_size = _prepare_job(book, settings, n_trades, chunk_size, resampling, fan_points)
+    entropy, streams = _stream_plan(n_sims, seed)
+    parts: List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = []
+    chunks = _iter_parts(job, _group_streams(streams, chunk_size), workers)
+    try:
+        done = 0
+        for part in chunks:
+            parts.append(part)
+            done += len(part[0])
+            if progress is not None:
+                progress(done, n_sims, lambda k=len(parts): _collect_parts(job, parts[:k], entropy, years))
+    finally:
+        chunks.close()
+    return _collect_parts(job, parts, entropy, years)
+
+
+def _collect_parts(
+    job: _PathJob, parts: List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]], entropy: int, years: float
+) -> Dict[str, np.ndarray]:
+    """Result dict of ``run_monte_carlo_parallel`` over the evaluated chunks."""
+    settings = job.settings
+    final_equities = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+    max_dds = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+    result = {
+        "final_equities": final_equities,
+        "cagrs": cagr_array(settings.initial_equity, final_equities, years),
+        "max_drawdowns": max_dds,
+        "seed": entropy,
+    }
+    if job.fan_columns is not None and parts:
+        samples = np.concatenate([p[2] for p in parts])
+        result["fan_trades"] = job.fan_columns + 1
+        result["fan_bands"] = np.quantile(samples, FAN_QUANTILES, axis=0)
+    return result
+
+
+def run_monte_carlo_vectorized(
+    book: TradeBook,
+    settings: SimulationSettings,
+    n_sims: int = 100,
+    n_trades: Optional[int] = None,
+    seed: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    years: float = 1.0,
+    resampling: Optional[Resampling] = None,
+) -> Dict[str, np.ndarray]:
+    """NumPy Monte Carlo: all paths of a chunk are drawn and evaluated at once.
+
+    Each chunk draws an index matrix (permutations, IID or block bootstrap
+    draws per ``resampling``), gathers the per-trade growth steps into a
+    ``(paths, trades)`` matrix and reduces it with axis-wise ``cumprod`` /
+    ``maximum.accumulate``. Paths are evaluated in drawn order. ``chunk_size``
+    (paths per chunk) bounds memory; by default a chunk holds at most
+    ``MONTE_CARLO_MAX_CHUNK_CELLS`` cells. Paths without a closed form run
+    through the loop engine. Single-process form of ``run_monte_carlo_parallel``
+    with identical output for the same seed.
+    """
+    return run_monte_carlo_parallel(book, settings, n_sims, n_trades, seed, 1, chunk_size, years, resampling)
+
+
+# Quantiles whose confidence intervals decide when a streaming run stops.
+DEFAULT_STOP_TARGETS: Tuple[Tuple[str, float], ...] = (("final_equities", 0.05), ("max_drawdowns", 0.5))
+
+
+@dataclass
+class StreamingMonteCarloResult:
+    """Summaries of a streaming Monte Carlo run (no per-path arrays kept)."""
+
+    stats: Dict[str, MetricStats]
+    n_paths: int
+    converged: bool
+    seed: int
+    targets: List[Dict] = field(default_factory=list)
+
+    def summary(self) -> List[Dict]:
+        rows = []
+        for name, stats in self.stats.items():
+            p5, p50, p95 = stats.sketch.quantile(np.array([0.05, 0.5, 0.95]))
+            rows.append(
+                {
+                    "metric": name,
+                    "mean": stats.moments.mean,
+                    "std": stats.moments.std,
+                    "min": stats.moments.min,
+                    "p5": float(p5),
+                    "median": float(p50),
+                    "p95": float(p95),
+                    "max": stats.moments.max,
+                }
+            )
+        return rows
+
+
+def _target_rows(
+    stats: Dict[str, MetricStats], targets: Sequence[Tuple[str, float]], confidence: float, tolerance: float
+) -> List[Dict]:
+    rows = []
+    for name, q in targets:
+        estimate, low, high = stats[name].quantile_interval(q, confidence)
+        half_width = (high - low) / 2
+        rows.append(
+            {
+                "metric": name,
+                "quantile": q,
+                "estimate": estimate,
+                "ci_low": low,
+                "ci_high": high,
+                "relative_half_width": half_width / abs(estimate) if estimate else (0.0 if half_width == 0 else math.inf),
+                "converged": half_width <= tolerance * abs(estimate),
+            }
+        )
+    return rows
+
+
+def run_monte_carlo_streaming(
+    book: TradeBook,
+    settings: SimulationSettings,
+    tolerance: float = 0.01,
+    targets: Sequence[Tuple[str, float]] = DEFAULT_STOP_TARGETS,
+    confidence: float = 0.95,
+    min_sims: int = 1_000,
+    max_sims: int = 200_000,
+    n_trades: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    years: float = 1.0,
+    resampling: Optional[Resampling] = None,
+    progress: Optional[Progress] = None,
+) -> StreamingMonteCarloResult:
+    """Monte Carlo that runs until the target quantiles are precise enough.
+
+    Per-path outcomes are folded into constant-memory ``MetricStats`` chunk
+    by chunk and discarded. After each chunk (once ``min_sims`` paths are
+    done) every ``(metric, q)`` target's confidence interval is checked; the
+    run stops when all half-widths are within ``tolerance`` relative to the
+    estimate, or at ``max_sims``. Paths are drawn exactly as in
+    ``run_monte_carlo_parallel`` with the same seed, so a run that stops
+    after ``n_paths`` paths summarizes that run's first ``n_paths`` paths.
+
+    ``progress`` is called after every chunk against ``max_sims``; its
+    snapshot summarizes a copy of the statistics at that point.
+    """
+    unknown = [name for name, _ in targets if name not in ("final_equities", "cagrs", "max_drawdowns")]
+    if unknown:
+        raise ValueError(f"Unknown Monte Carlo metrics: {', '.join(unknown)}")
+    job, default_chunk = _prepare_job(book, settings, n_trades, chunk_size, resampling)
+    if chunk_size is None:
+        # Small books would otherwise fit every path into one chunk and
+        # never get a chance to stop early.
+        chunk_size = min(default_chunk, max(min_sims, config.MONTE_CARLO_STREAM_PATHS))
+    entropy, streams = _stream_plan(max_sims, seed)
+    stats = {name: MetricStats() for name in ("final_equities", "cagrs", "max_drawdowns")}
+    rows: List[Dict] = []
+    converged = False
+
+    parts = _iter_parts(job, _group_streams(streams, chunk_size), workers)
+    try:
+        for final_equities, max_dds, _ in parts:
+            stats["final_equities"].update(final_equities)
+            stats["cagrs"].update(cagr_array(settings.initial_equity, final_equities, years))
+            stats["max_drawdowns"].update(max_dds)
+            count = stats["final_equities"].count
+            if count >= min_sims:
+                rows = _target_rows(stats, targets, confidence, tolerance)
+                converged = all(row["converged"] for row in rows)
+            if progress is not None:
+                frozen = copy.deepcopy(stats)
+                progress(
+                    count,
+                    max_sims,
+                    lambda frozen=frozen, count=count, converged=converged: StreamingMonteCarloResult(
+                        frozen, count, converged, entropy, _target_rows(frozen, targets, confidence, tolerance)
+                    ),
+                )
+            if converged:
+                break
+    finally:
+        parts.close()
+
+    if not rows:
+        rows = _target_rows(stats, targets, confidence, tolerance)
+    return StreamingMonteCarloResult(stats, stats["final_equities"].count, converged, entropy, rows)
@@ -0,0 +1,120 @@
+"""Event-driven simulation with overlapping positions.
+
+Trades are opened in entry order and closed in exit order. Open positions
+live in a min-heap keyed by exit time, and their combined risk is kept as a
+running sum, so each entry/exit costs O(log n) no matter how many positions
+are open. New entries are sized from realized equity and scaled down or
+skipped when they would push total open risk past ``max_portfolio_risk``
+(technical_spec §5.2).
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+from src.models.book import ResultBook, TradeBook
+from src.risk.sizing import position_sizer
+
+if TYPE_CHECKING:
+    from src.simulation.engine import SimulationSettings
+
+
+class OverlapMode:
+    SEQUENTIAL = "sequential"  # every trade sized alone (engine.simulate)
+    SCALE = "scale"  # shrink new entries to the remaining risk budget
+    SKIP = "skip"  # skip new entries that do not fit the budget
+
+
+def simulate_overlapping(book: TradeBook, settings: SimulationSettings) -> ResultBook:
+    """Simulate concurrent positions with a portfolio-wide risk cap.
+
+    Rows of the returned book are in exit order (ties by entry order), so
+    ``equity_after`` is the realized equity curve. ``equity_before`` is the
+    realized equity the position was sized from, and ``portfolio_risk_sum``
+    is the open risk including the new position as a share of that equity.
+    Skipped entries are kept with zero quantity, pnl and risk.
+    """
+    book = book.sort_by_entry()
+    n = len(book)
+    cap = settings.max_portfolio_risk if settings.max_portfolio_risk and settings.max_portfolio_risk > 0 else None
+    skip_only = settings.overlap_mode == OverlapMode.SKIP
+    size = position_sizer(settings.sizing_mode, settings.sizing_params)
+
+    pnl = np.zeros(n)
+    risk = np.zeros(n)
+    before = np.zeros(n)
+    f_risk = np.zeros(n)
+    portfolio = np.zeros(n)
+    after = np.zeros(n)
+    exit_order = np.empty(n, dtype=np.int64)
+
+    equity = settings.initial_equity
+    open_risk = 0.0
+    open_heap: List[Tuple[int, int]] = []
+    closed = 0
+
+    def close(i: int) -> None:
+        nonlocal equity, open_risk, closed
+        equity += pnl[i]
+        open_risk -= risk[i]
+        if not open_heap:
+            open_risk = 0.0  # drop accumulated rounding once flat
+        after[i] = equity
+        exit_order[closed] = i
+        closed += 1
+
+    columns = zip(
+        book.entry_time.tolist(),
+        book.exit_time.tolist(),
+        book.entry_price.tolist(),
+        book.exit_price.tolist(),
+        book.stop_price.tolist(),
+        book.quantity.tolist(),
+        book.direction.tolist(),
+    )
+    for i, (entry_time, exit_time, entry_price, exit_price, stop_price, quantity, direction) in enumerate(columns):
+        while open_heap and open_heap[0][0] <= entry_time:
+            close(heapq.heappop(open_heap)[1])
+
+        stop = None if stop_price != stop_price else stop_price
+        qty, risk_amount = size(equity, entry_price, stop)
+        if quantity == quantity:
+            qty = quantity
+            if stop is not None:
+                risk_amount = abs(entry_price - stop) * qty
+
+        if cap is not None and risk_amount > 0 and open_risk + risk_amount > cap * equity:
+            budget = cap * equity - open_risk
+            if skip_only or budget <= 0:
+                qty = risk_amount = 0.0
+            else:
+                scale = budget / risk_amount
+                qty *= scale
+                risk_amount = budget
+
+        trade_pnl = (exit_price - entry_price) * qty * direction
+        pnl[i] = trade_pnl
+        risk[i] = risk_amount
+        before[i] = equity
+        f_risk[i] = risk_amount / equity if equity > 0 else 0.0
+        open_risk += risk_amount
+        portfolio[i] = open_risk / equity if equity > 0 else 0.0
+        heapq.heappush(open_heap, (exit_time, i))
+
+    while open_heap:
+        close(heapq.heappop(open_heap)[1])
+
+    r_multiple = np.divide(pnl, risk, out=np.zeros(n), where=risk != 0)
+    return ResultBook(
+        trades=book,
+        pnl=pnl,
+        risk_amount=risk,
+        equity_before=before,
+        equity_after=after,
+        r_multiple=r_multiple,
+        f_risk=f_risk,
+        portfolio_risk_sum=portfolio,
+    )[exit_order]
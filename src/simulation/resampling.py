@@ -0,0 +1,126 @@
+"""Index generators for Monte Carlo resampling.
+
+Every generator returns a ``(paths, length)`` matrix of source indices for
+all paths at once, so the cost per path is a few array passes whatever the
+mode. Block modes keep runs of consecutive trades together and so preserve
+streaks and regime clustering that IID draws break up:
+
+- moving block: blocks of ``block_length`` consecutive trades starting at uniform positions
+- stationary (Politis & Romano): circular blocks with geometric lengths of mean ``block_length``
+
+With ``by_day`` the units being resampled are calendar days of entry, and
+each drawn day expands to all of its trades, so trades from different
+strategies that overlap in time stay together.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src import config
+
+
+class ResamplingMode:
+    SHUFFLE = "shuffle"  # permutation of all units (IID draws when a path length is given)
+    IID = "iid"  # draws with replacement
+    BLOCK = "block"  # moving-block bootstrap
+    STATIONARY = "stationary"  # stationary bootstrap (geometric block lengths)
+
+
+@dataclass(frozen=True)
+class Resampling:
+    mode: str = ResamplingMode.SHUFFLE
+    block_length: float = 10.0  # fixed (block) or mean (stationary) length in units
+    by_day: bool = False
+
+
+def block_indices(rng: np.random.Generator, n: int, n_paths: int, length: int, block_length: int) -> np.ndarray:
+    """Moving-block bootstrap: concatenated blocks of consecutive units."""
+    block_length = int(min(max(block_length, 1), n))
+    n_blocks = -(-length // block_length)
+    starts = rng.integers(0, n - block_length + 1, size=(n_paths, n_blocks))
+    idx = starts[:, :, None] + np.arange(block_length)
+    return idx.reshape(n_paths, n_blocks * block_length)[:, :length]
+
+
+def stationary_indices(rng: np.random.Generator, n: int, n_paths: int, length: int, mean_block: float) -> np.ndarray:
+    """Stationary bootstrap: each step starts a new block with probability ``1 / mean_block``.
+
+    A block starts at a uniform position and wraps around the end of the
+    source. Block boundaries come from one uniform draw per cell; numbering
+    blocks with a flat ``cumsum`` turns the per-cell lookup into a gather
+    from the small per-block array, with no per-path loop.
+    """
+    # 16-bit uniforms are precise enough for the start probability and cheaper to draw.
+    threshold = round(65536 / max(mean_block, 1.0))
+    new_block = rng.integers(0, 65536, size=(n_paths, length), dtype=np.uint16) < threshold
+    new_block[:, 0] = True
+    id_dtype = np.int32 if new_block.size < 2**31 else np.int64
+    block_id = np.cumsum(new_block, axis=None, dtype=id_dtype)
+    block_id -= 1
+    block_pos = np.flatnonzero(new_block) % length
+    # idx = start + (column - column of the block start), folded into one offset per block
+    offsets = rng.integers(0, n, size=len(block_pos)) - block_pos
+    idx = np.take(offsets, block_id).reshape(n_paths, length)
+    idx += np.arange(length)
+    if length <= n:
+        idx[idx >= n] -= n
+    else:
+        idx %= n
+    return idx
+
+
+def unit_indices(
+    rng: np.random.Generator, resampling: Resampling, n: int, n_paths: int, length: Optional[int]
+) -> np.ndarray:
+    """Draw ``(n_paths, length)`` unit indices; ``length`` defaults to ``n``."""
+    mode = resampling.mode
+    if mode == ResamplingMode.SHUFFLE and not length:
+        return rng.permuted(np.broadcast_to(np.arange(n), (n_paths, n)), axis=1)
+    length = length or n
+    if mode == ResamplingMode.BLOCK:
+        return block_indices(rng, n, n_paths, length, int(round(resampling.block_length)))
+    if mode == ResamplingMode.STATIONARY:
+        return stationary_indices(rng, n, n_paths, length, resampling.block_length)
+    if mode in (ResamplingMode.SHUFFLE, ResamplingMode.IID):
+        return rng.integers(0, n, size=(n_paths, length))
+    raise ValueError(f"Unknown resampling mode: {mode}")
+
+
+def day_units(entry_time: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """``(starts, counts)`` of calendar days in entry-sorted ``entry_time`` (ns)."""
+    if not len(entry_time):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    day = entry_time // config.NS_PER_DAY
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(day)) + 1])
+    counts = np.diff(np.concatenate([starts, [len(day)]]))
+    return starts, counts
+
+
+def expand_units(unit_idx: np.ndarray, starts: np.ndarray, counts: np.ndarray, pad: int) -> np.ndarray:
+    """Replace each drawn unit by its rows; rows are right-padded with ``pad``.
+
+    Paths draw different numbers of trades, so the result is as wide as the
+    longest path and shorter paths end in ``pad`` entries. Units must not be
+    empty.
+    """
+    n_paths = len(unit_idx)
+    sizes = counts[unit_idx]
+    lengths = sizes.sum(axis=1)
+    width = int(lengths.max()) if sizes.size else 0
+    flat_units = unit_idx.ravel()
+    flat_sizes = sizes.ravel()
+    first = starts[flat_units]
+    # Row numbers run up by one inside a unit and jump to the next unit's
+    # first row at its boundary: one scatter of the jumps plus a cumsum.
+    steps = np.ones(int(flat_sizes.sum()), dtype=np.int64)
+    boundaries = np.cumsum(flat_sizes) - flat_sizes
+    steps[boundaries[1:]] = first[1:] - (first[:-1] + flat_sizes[:-1] - 1)
+    if len(steps):
+        steps[0] = first[0]
+    out = np.full((n_paths, width), pad, dtype=np.int64)
+    out[np.arange(width) < lengths[:, None]] = np.cumsum(steps)
+    return out
@@ -0,0 +1,348 @@
+"""Memoized simulation, metrics and Monte Carlo results across reruns.
+
+Streamlit reruns the whole script on every widget change. Results are keyed
+by a fingerprint of the trade columns, the full ``SimulationSettings``
+(sizing parameters included) and the call's own arguments, so a rerun that
+changes neither reuses the previous output.
+
+Two tiers:
+
+- memory: LRU ordered dict bounded by the bytes held in its values
+- disk (optional): one pickle per key in a size-bounded directory, evicted
+  by mtime like ``TradeFileCache``; survives restarts
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from src import config
+from src.models.book import Categorical, ResultBook, TradeBook
+from src.risk.metrics import compute_metrics
+from src.risk.ruin import empirical_ruin_table
+from src.simulation.engine import SimulationSettings, simulate_book
+
+T = TypeVar("T")
+
+# Hashed into every key: bump when a cached result type (ResultBook,
+# MonteCarloResult, metric dicts, ...) changes shape, so pickles of the old
+# shape are never loaded.
+CACHE_FORMAT_VERSION = 1
+
+_book_digests: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def book_fingerprint(book: TradeBook) -> str:
+    """SHA-256 over every column's dtype, shape and bytes (memoized per book object).
+
+    A book loaded through ``TradeFileCache`` is identified by the content
+    hash of its source file (``source_digest``) instead, with no rehashing.
+    """
+    source = getattr(book, "source_digest", None)
+    if source is not None:
+        return f"file:{source}"
+    known = _book_digests.get(id(book))
+    if known is not None and known[0]() is book:
+        return known[1]
+    digest = hashlib.sha256()
+    for f in fields(TradeBook):
+        value = getattr(book, f.name)
+        arrays = (value.codes, value.categories) if isinstance(value, Categorical) else (value,)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{f.name}:{array.dtype.str}:{array.shape}".encode())
+            digest.update(array.data)
+    fingerprint = digest.hexdigest()
+    key = id(book)
+    _book_digests[key] = (weakref.ref(book, lambda _: _book_digests.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def _jsonable(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot fingerprint {type(value).__name__}")
+
+
+def result_key(kind: str, book: TradeBook, settings: SimulationSettings, **params) -> str:
+    """Cache key ``"<kind>:<sha256>"`` for a computation on ``book`` with ``settings``."""
+    payload = json.dumps({"settings": asdict(settings), "params": params}, sort_keys=True, default=_jsonable)
+    digest = hashlib.sha256(f"{kind}\0v{CACHE_FORMAT_VERSION}\0{book_fingerprint(book)}\0{payload}".encode())
+    return f"{kind}:{digest.hexdigest()}"
+
+
+def estimate_nbytes(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate memory held by a result: array buffers plus container overhead."""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v, seen) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v, seen) for v in value)
+    if is_dataclass(value):
+        return sum(estimate_nbytes(getattr(value, f.name), seen) for f in fields(value))
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_nbytes(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional disk) cache of computed results."""
+
+    def __init__(
+        self,
+        max_bytes: int = config.RESULT_CACHE_MAX_BYTES,
+        directory: Optional[str | Path] = config.RESULT_CACHE_DIR,
+        disk_max_bytes: int = config.RESULT_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.directory / f"{key.replace(':', '-')}.pkl"
+
+    def _remember(self, key: str, value: Any) -> None:
+        """Insert into the memory tier and evict LRU entries over budget (lock held)."""
+        size = estimate_nbytes(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value or None; a disk hit is promoted to memory."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], T]) -> T:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if self.directory is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # mtime doubles as the LRU clock
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated, corrupt or written by an incompatible version (a
+            # pickle can fail with almost any exception): drop it, recompute.
+            path.unlink(missing_ok=True)
+            return None
+        return value
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if os.path.getsize(tmp) > self.disk_max_bytes:
+                os.remove(tmp)
+                return
+            os.replace(tmp, self._disk_path(key))
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self._evict_disk()
+
+    def _disk_entries(self) -> List[Tuple[float, int, Path]]:
+        if self.directory is None or not self.directory.exists():
+            return []
+        return [(p.stat().st_mtime, p.stat().st_size, p) for p in self.directory.glob("*.pkl")]
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop every entry, or only one ``kind`` and its sub-kinds, from both tiers.
+
+        ``invalidate("monte_carlo")`` also drops ``"monte_carlo.<runner>"`` entries.
+        """
+
+        def matches(entry_kind: str) -> bool:
+            return kind is None or entry_kind == kind or entry_kind.startswith(f"{kind}.")
+
+        with self._lock:
+            for key in [k for k in self._entries if matches(k.split(":", 1)[0])]:
+                self._bytes -= self._entries.pop(key)[1]
+        for _, _, path in self._disk_entries():
+            if matches(path.stem.rsplit("-", 1)[0]):
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        disk = self._disk_entries()
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(disk),
+            "disk_bytes": sum(size for _, size, _ in disk),
+        }
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def default_result_cache() -> ResultCache:
+    """Process-wide cache shared by Streamlit reruns."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+def cached_simulation(book: TradeBook, settings: SimulationSettings, cache: Optional[ResultCache] = None) -> ResultBook:
+    cache = cache or default_result_cache()
+    return cache.get_or_compute(result_key("simulation", book, settings), lambda: simulate_book(book, settings))
+
+
+def cached_metrics(
+    book: TradeBook, settings: SimulationSettings, years: float = 1.0, cache: Optional[ResultCache] = None
+) -> dict:
+    cache = cache or default_result_cache()
+    key = result_key("metrics", book, settings, years=years)
+    return cache.get_or_compute(
+        key, lambda: compute_metrics(cached_simulation(book, settings, cache), settings.initial_equity, years)
+    )
+
+
+def cached_monte_carlo(
+    run: Callable[..., T],
+    book: TradeBook,
+    settings: SimulationSettings,
+    seed: Optional[int],
+    cache: Optional[ResultCache] = None,
+    **params,
+) -> T:
+    """Call a Monte Carlo runner (``run(book, settings, seed=..., **params)``) through the cache.
+
+    Results are deterministic for a given seed, so they are keyed by it. A
+    run without a seed draws a fresh one; its result is stored under the
+    drawn seed, which a later call can pass to get it back. Parameters that
+    do not change results for a seed (``workers``, ``chunk_size``,
+    ``progress``) are left out of the key.
+    """
+    cache = cache or default_result_cache()
+    key_params = {k: v for k, v in params.items() if k not in ("workers", "chunk_size", "progress")}
+
+    def key_for(value: Optional[int]) -> str:
+        return result_key(f"monte_carlo.{run.__name__}", book, settings, seed=value, **key_params)
+
+    if seed is not None:
+        cached = cache.get(key_for(seed))
+        if cached is not None:
+            return cached
+    result = run(book, settings, seed=seed, **params)
+    drawn = result["seed"] if isinstance(result, dict) else result.seed
+    cache.put(key_for(drawn), result)
+    return result
+
+
+def cached_empirical_ruin_table(
+    r_multiples: np.ndarray,
+    f_values: List[float],
+    ruin_threshold: float = 0.1,
+    n_paths: int = 5_000,
+    n_trades: Optional[int] = None,
+    seed: Optional[int] = 0,
+    cache: Optional[ResultCache] = None,
+) -> List[Tuple[float, float, float, float]]:
+    """``empirical_ruin_table`` through the cache, keyed by the R values and arguments.
+
+    Only seeded runs are cached; ``seed=None`` computes a fresh estimate.
+    """
+    r_multiples = np.ascontiguousarray(r_multiples, dtype=float)
+    f_values = [float(f) for f in f_values]
+
+    def compute():
+        return empirical_ruin_table(r_multiples, f_values, ruin_threshold, n_paths, n_trades, seed)
+
+    if seed is None:
+        return compute()
+    cache = cache or default_result_cache()
+    params = json.dumps([f_values, ruin_threshold, n_paths, n_trades, seed], default=_jsonable)
+    digest = hashlib.sha256(f"empirical_ruin\0v{CACHE_FORMAT_VERSION}\0".encode())
+    digest.update(r_multiples.data)
+    digest.update(b"\0" + params.encode())
+    return cache.get_or_compute(f"empirical_ruin:{digest.hexdigest()}", compute)
@@ -0,0 +1,166 @@
+"""Batched parameter sweeps over simulation settings.
+
+Grid points that share a closed-form equity model (see ``vectorized.py``)
+are evaluated together: their per-trade steps form a ``(points, trades)``
+matrix whose row-wise ``cumprod``/``cumsum`` is every equity curve at once.
+Points without a closed form fall back to ``simulate_book`` one at a time.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import asdict, fields, replace
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.models.book import TradeBook
+from src.risk.metrics import cagr_array, compute_metrics, curve_drawdowns
+from src.risk.sizing import PositionSizingMode, PositionSizingParams
+from src.simulation.engine import SimulationSettings, simulate_book
+from src.simulation.overlap import OverlapMode
+from src.simulation.vectorized import fixed_lot_quantity, risk_fraction
+
+SETTINGS_FIELDS = [f.name for f in fields(SimulationSettings) if f.name != "sizing_params"]
+PARAM_FIELDS = [f.name for f in fields(PositionSizingParams)]
+METRIC_COLUMNS = ["final_equity", "cagr", "max_drawdown", "max_dd_duration"]
+
+# Upper bound on matrix cells per batch (~128 MB per float64 temporary).
+MAX_BATCH_CELLS = 1 << 24
+
+
+def settings_grid(base: SimulationSettings, **axes: Sequence) -> List[SimulationSettings]:
+    """Cartesian product of ``base`` over the given axes.
+
+    Axis names may be ``SimulationSettings`` fields (``max_portfolio_risk``,
+    ``initial_equity``, ...) or ``PositionSizingParams`` fields (``f``,
+    ``safety_coefficient``, ...).
+    """
+    unknown = [name for name in axes if name not in SETTINGS_FIELDS and name not in PARAM_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown sweep axes: {', '.join(unknown)}")
+    names = list(axes)
+    grid = []
+    for values in itertools.product(*(axes[name] for name in names)):
+        point = dict(zip(names, values))
+        params = replace(base.sizing_params, **{k: v for k, v in point.items() if k in PARAM_FIELDS})
+        grid.append(replace(base, sizing_params=params, **{k: v for k, v in point.items() if k in SETTINGS_FIELDS}))
+    return grid
+
+
+def _settings_row(settings: SimulationSettings) -> Dict:
+    row = {name: getattr(settings, name) for name in SETTINGS_FIELDS}
+    row.update(asdict(settings.sizing_params))
+    return row
+
+
+def _summaries(equity: np.ndarray, initial: np.ndarray, years: float) -> Dict[str, np.ndarray]:
+    max_dd, duration = curve_drawdowns(equity)
+    final = equity[:, -1] if equity.shape[1] else initial
+    return {
+        "final_equity": final,
+        "cagr": cagr_array(initial, final, years),
+        "max_drawdown": max_dd,
+        "max_dd_duration": duration,
+    }
+
+
+def _batches(points: List[int], n_trades: int) -> List[List[int]]:
+    size = max(1, MAX_BATCH_CELLS // max(n_trades, 1))
+    return [points[i : i + size] for i in range(0, len(points), size)]
+
+
+def _sweep_fractional(
+    book: TradeBook, grid: Sequence[SimulationSettings], points: List[int], years: float, out: Dict
+) -> List[int]:
+    per_unit = book.per_unit_risk
+    entry = book.entry_price
+    move = book.price_move
+    staked = per_unit > 0
+    # steps = f_capped * stop_term + f * no_stop_term (see vectorized.growth_model)
+    stop_term = np.where(staked, move / np.where(staked, per_unit, 1.0), 0.0)
+    no_stop_term = np.where(~staked & (entry > 0), move / np.where(entry > 0, entry, 1.0), 0.0)
+
+    exact: List[int] = []
+    for batch in _batches(points, len(book)):
+        f = np.array([risk_fraction(grid[i]) for i in batch])
+        cap = np.array([grid[i].max_portfolio_risk or 0.0 for i in batch])
+        f_capped = np.where((cap > 0) & (f > cap), cap, f)
+        initial = np.array([grid[i].initial_equity for i in batch], dtype=float)
+        growth = 1.0 + f_capped[:, None] * stop_term + f[:, None] * no_stop_term
+        equity = initial[:, None] * np.cumprod(growth, axis=1)
+        exact += _store(out, batch, _summaries(equity, initial, years), np.any(equity <= 0, axis=1))
+    return exact
+
+
+def _sweep_fixed_lot(
+    book: TradeBook, grid: Sequence[SimulationSettings], points: List[int], years: float, out: Dict
+) -> List[int]:
+    per_unit = book.per_unit_risk
+    move = book.price_move
+    exact: List[int] = []
+    for batch in _batches(points, len(book)):
+        qty = np.stack([fixed_lot_quantity(book, grid[i].sizing_params) for i in batch])
+        initial = np.array([grid[i].initial_equity for i in batch], dtype=float)
+        cap = np.array([grid[i].max_portfolio_risk or 0.0 for i in batch])
+        equity = initial[:, None] + np.cumsum(move * qty, axis=1)
+        # A binding cap makes the step depend on equity: those points run exactly.
+        before = np.concatenate([initial[:, None], equity[:, :-1]], axis=1)
+        binding = (cap[:, None] > 0) & (per_unit * qty > cap[:, None] * before)
+        needs_exact = np.any(binding | (equity <= 0), axis=1)
+        exact += _store(out, batch, _summaries(equity, initial, years), needs_exact)
+    return exact
+
+
+def _store(out: Dict, batch: List[int], summaries: Dict[str, np.ndarray], needs_exact: np.ndarray) -> List[int]:
+    """Record batched summaries; return the points that must be recomputed."""
+    exact = []
+    for row, i in enumerate(batch):
+        if needs_exact[row]:
+            exact.append(i)
+        else:
+            out[i] = {name: float(values[row]) for name, values in summaries.items()}
+    return exact
+
+
+def _store_exact(out: Dict, i: int, settings: SimulationSettings, book: TradeBook, years: float) -> None:
+    metrics = compute_metrics(simulate_book(book, settings), settings.initial_equity, years, series=False)
+    out[i] = {name: float(metrics[name]) for name in METRIC_COLUMNS}
+
+
+def run_sweep(book: TradeBook, grid: Sequence[SimulationSettings], years: float = 1.0) -> pd.DataFrame:
+    """Evaluate every grid point and return one row of settings + metrics each.
+
+    Fractional/Kelly points are computed as one ``cumprod`` over a 2-D
+    growth matrix and fixed-lot points as one ``cumsum``, in batches of at
+    most ``MAX_BATCH_CELLS`` cells. Other points (overlap modes, CSV
+    quantities under fractional sizing, equity hitting zero) run through
+    ``simulate_book``.
+    """
+    book = book.sort_by_entry()
+    has_quantity = bool(np.any(~np.isnan(book.quantity)))
+    fractional: List[int] = []
+    fixed_lot: List[int] = []
+    exact: List[int] = []
+    for i, settings in enumerate(grid):
+        if settings.overlap_mode != OverlapMode.SEQUENTIAL:
+            exact.append(i)
+        elif settings.sizing_mode == PositionSizingMode.FIXED_LOT:
+            fixed_lot.append(i)
+        elif has_quantity:
+            exact.append(i)
+        else:
+            fractional.append(i)
+
+    out: Dict = {}
+    if fractional:
+        exact += _sweep_fractional(book, grid, fractional, years, out)
+    if fixed_lot:
+        exact += _sweep_fixed_lot(book, grid, fixed_lot, years, out)
+    for i in exact:
+        _store_exact(out, i, grid[i], book, years)
+
+    rows = [{**_settings_row(settings), **out[i]} for i, settings in enumerate(grid)]
+    table = pd.DataFrame(rows, columns=SETTINGS_FIELDS + PARAM_FIELDS + METRIC_COLUMNS)
+    return table.astype({"max_dd_duration": int})
@@ -0,0 +1,128 @@
+"""Closed-form NumPy fast path for the sequential simulation.
+
+With fixed-fractional or Kelly sizing every trade risks a constant share of
+current equity, so equity follows ``E[k+1] = E[k] * (1 + ret[k])`` and the
+whole curve is a ``cumprod``. With fixed-lot sizing pnl does not depend on
+equity and the curve is a ``cumsum``. The per-trade ``max_portfolio_risk``
+cap is elementwise in the first case and only needs a check in the second.
+Anything else (explicit CSV quantities mixed into fractional sizing, a
+binding cap on fixed lots, equity reaching zero) is left to the loop engine
+in ``engine.py``, which stays the reference implementation.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+
+from src.models.book import ResultBook, TradeBook
+from src.risk.sizing import (
+    PositionSizingMode,
+    PositionSizingParams,
+    compute_position_sizes,
+    kelly_fraction,
+)
+
+if TYPE_CHECKING:
+    from src.simulation.engine import SimulationSettings
+
+
+@dataclass(frozen=True)
+class GrowthModel:
+    """Order-independent per-trade equity steps.
+
+    ``multiplicative``: ``steps`` are returns on equity (``E *= 1 + step``).
+    Otherwise ``steps`` are pnl amounts (``E += step``) and ``risk`` holds the
+    fixed risk amounts, which callers must check against the cap.
+    """
+
+    multiplicative: bool
+    steps: np.ndarray
+    risk: np.ndarray
+
+
+def risk_fraction(settings: SimulationSettings) -> float:
+    """Run-constant share of equity risked per trade for fractional modes."""
+    if settings.sizing_mode == PositionSizingMode.FRACTIONAL_KELLY:
+        return kelly_fraction(settings.sizing_params)
+    return settings.sizing_params.f or 0.0
+
+
+def fixed_lot_quantity(book: TradeBook, params: PositionSizingParams) -> np.ndarray:
+    """Per-trade fixed-lot quantity, with CSV quantities taking precedence."""
+    qty, _ = compute_position_sizes(PositionSizingMode.FIXED_LOT, 1.0, book.entry_price, book.stop_price, params)
+    explicit = ~np.isnan(book.quantity)
+    return np.where(explicit, book.quantity, qty)
+
+
+def growth_model(book: TradeBook, settings: SimulationSettings) -> Optional[GrowthModel]:
+    """Describe ``book`` as multiplicative or additive equity steps, if possible."""
+    cap = settings.max_portfolio_risk
+    per_unit = book.per_unit_risk
+    move = book.price_move
+
+    if settings.sizing_mode == PositionSizingMode.FIXED_LOT:
+        qty = fixed_lot_quantity(book, settings.sizing_params)
+        return GrowthModel(False, move * qty, per_unit * qty)
+
+    if np.any(~np.isnan(book.quantity)):
+        return None
+    # Quantity and risk per unit of equity.
+    qty_per_equity, risk_pct = compute_position_sizes(
+        settings.sizing_mode, 1.0, book.entry_price, book.stop_price, settings.sizing_params
+    )
+    if cap and cap > 0:
+        binding = risk_pct > cap
+        qty_per_equity = np.where(binding, qty_per_equity * (cap / np.where(binding, risk_pct, 1.0)), qty_per_equity)
+        risk_pct = np.minimum(risk_pct, cap)
+    return GrowthModel(True, move * qty_per_equity, risk_pct)
+
+
+def equity_path(model: GrowthModel, initial_equity: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(equity_before, equity_after)`` for a growth model."""
+    if model.multiplicative:
+        after = initial_equity * np.cumprod(1.0 + model.steps)
+    else:
+        after = initial_equity + np.cumsum(model.steps)
+    before = np.empty_like(after)
+    if len(after):
+        before[0] = initial_equity
+        before[1:] = after[:-1]
+    return before, after
+
+
+def simulate_vectorized(book: TradeBook, settings: SimulationSettings) -> Optional[ResultBook]:
+    """Array-pass simulation, or None when the case needs the loop engine."""
+    book = book.sort_by_entry()
+    model = growth_model(book, settings)
+    if model is None:
+        return None
+    before, after = equity_path(model, settings.initial_equity)
+    if np.any(before <= 0):
+        return None
+
+    cap = settings.max_portfolio_risk
+    if model.multiplicative:
+        risk = before * model.risk
+        pnl = model.steps * before
+        risk_pct = model.risk.copy()
+    else:
+        risk = model.risk
+        risk_pct = risk / before
+        if cap and cap > 0 and np.any(risk_pct > cap):
+            return None
+        pnl = model.steps
+
+    r_multiple = np.divide(pnl, risk, out=np.zeros_like(pnl), where=risk != 0)
+    return ResultBook(
+        trades=book,
+        pnl=pnl,
+        risk_amount=risk,
+        equity_before=before,
+        equity_after=after,
+        r_multiple=r_multiple,
+        f_risk=risk_pct,
+        portfolio_risk_sum=risk_pct.copy(),
+    )
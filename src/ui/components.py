@@ -2,24 +2,26 @@
 
 from __future__ import annotations
 
+import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from src import config
+from src.ui.downsample import downsample_indices, drawdown_extremes, histogram_table
+
 
 def equity_and_drawdown_charts(metrics: dict) -> None:
     equity_curve = metrics.get("equity_curve", [])
     dd_series = metrics.get("drawdown_series", [])
-    if not equity_curve:
+    if not len(equity_curve):
         st.info("資産曲線を表示するにはトレードデータを読み込んでください。")
         return
 
-    df = pd.DataFrame(
-        {
-            "Trade": list(range(1, len(equity_curve) + 1)),
-            "Equity": equity_curve,
-            "Drawdown": dd_series if dd_series else [0.0] * len(equity_curve),
-        }
-    )
+    equity = np.asarray(equity_curve, dtype=float)
+    drawdown = np.asarray(dd_series, dtype=float) if len(dd_series) else np.zeros(len(equity))
+    idx = downsample_indices([equity, drawdown], config.MAX_CHART_POINTS, keep=drawdown_extremes(equity))
+    df = pd.DataFrame({"Trade": idx + 1, "Equity": equity[idx], "Drawdown": drawdown[idx]})
     st.line_chart(df, x="Trade", y=["Equity", "Drawdown"])
 
 
@@ -45,14 +47,268 @@ def monte_carlo_section(mc_results: dict) -> None:
         st.info("モンテカルロを実行すると分布が表示されます。")
         return
     st.subheader("モンテカルロ分布")
-    df = pd.DataFrame(mc_results)
-    st.bar_chart(df[["final_equities"]])
-    st.bar_chart(df[["cagrs"]])
+    if mc_results.get("seed") is not None:
+        st.caption(f"乱数シード: {mc_results['seed']}（同じシードで同じ結果を再現できます）")
+    for name in ("final_equities", "cagrs", "max_drawdowns"):
+        if name in mc_results:
+            _histogram_chart(MC_METRIC_LABELS[name], *histogram_table(mc_results[name], config.HISTOGRAM_BINS))
+    if "fan_bands" in mc_results:
+        monte_carlo_fan_chart(mc_results["fan_trades"], mc_results["fan_bands"])
+
+
+MC_METRIC_LABELS = {"final_equities": "最終資産", "cagrs": "CAGR", "max_drawdowns": "最大ドローダウン"}
+
+
+def _histogram_chart(label: str, centers: np.ndarray, counts: np.ndarray) -> None:
+    st.bar_chart(pd.DataFrame({label: centers, "件数": counts}), x=label)
+
+
+def monte_carlo_fan_chart(trades: np.ndarray, bands: np.ndarray) -> None:
+    """Equity percentile bands across paths: 5-95% and 25-75% areas with the median line."""
+    p05, p25, p50, p75, p95 = bands
+    df = pd.DataFrame({"trade": trades, "p05": p05, "p25": p25, "p50": p50, "p75": p75, "p95": p95})
+    x = alt.X("trade:Q", title="トレード数")
+    base = alt.Chart(df)
+    chart = (
+        base.mark_area(opacity=0.2).encode(x=x, y=alt.Y("p05:Q", title="資産（5-25-50-75-95%点）"), y2="p95:Q")
+        + base.mark_area(opacity=0.35).encode(x=x, y="p25:Q", y2="p75:Q")
+        + base.mark_line().encode(x=x, y="p50:Q")
+    )
+    st.altair_chart(chart)
+
+
+def monte_carlo_result(result) -> None:
+    """Either Monte Carlo section, depending on the runner that produced ``result``."""
+    if isinstance(result, dict):
+        monte_carlo_section(result)
+    else:
+        monte_carlo_streaming_section(result)
+
 
+def monte_carlo_streaming_section(result) -> None:
+    """Summary tables and histograms of a ``StreamingMonteCarloResult``."""
+    st.subheader("モンテカルロ分布（ストリーミング集計）")
+    status = "収束" if result.converged else "上限到達（未収束）"
+    st.caption(f"使用した試行数: {result.n_paths:,}（{status}） / 乱数シード: {result.seed}")
+    targets = pd.DataFrame(result.targets)
+    if not targets.empty:
+        targets["metric"] = targets["metric"].map(MC_METRIC_LABELS)
+        st.dataframe(
+            targets.rename(
+                columns={
+                    "metric": "指標",
+                    "quantile": "分位点",
+                    "estimate": "推定値",
+                    "ci_low": "信頼区間下限",
+                    "ci_high": "信頼区間上限",
+                    "relative_half_width": "相対半幅",
+                    "converged": "収束",
+                }
+            ),
+            hide_index=True,
+        )
+    summary = pd.DataFrame(result.summary())
+    summary["metric"] = summary["metric"].map(MC_METRIC_LABELS)
+    st.dataframe(summary.rename(columns={"metric": "指標", "median": "中央値"}), hide_index=True)
+    for name in ("final_equities", "cagrs"):
+        histogram = result.stats[name].histogram
+        if histogram is None:
+            continue
+        edges = histogram.edges
+        _histogram_chart(MC_METRIC_LABELS[name], (edges[:-1] + edges[1:]) / 2, histogram.counts)
 
-def ruin_table_component(ruin_rows: list[tuple[float, float]]) -> None:
+
+def ruin_table_component(
+    ruin_rows: list[tuple[float, float]],
+    empirical_rows: list[tuple[float, float, float, float]] | None = None,
+    exact_rows: list[tuple[float, float, float, bool]] | None = None,
+) -> None:
     if not ruin_rows:
         return
     df = pd.DataFrame(ruin_rows, columns=["f", "Risk of Ruin"])
     df["Risk of Ruin (%)"] = df["Risk of Ruin"] * 100
-    st.table(df[["f", "Risk of Ruin (%)"]])
+    columns = ["f", "Risk of Ruin (%)"]
+    if exact_rows:
+        df["Markov (%)"] = [markov * 100 for _, _, markov, _ in exact_rows]
+        df["近似の一致"] = ["✓" if agrees else "×" for *_, agrees in exact_rows]
+        columns += ["Markov (%)", "近似の一致"]
+    if empirical_rows:
+        empirical = pd.DataFrame(empirical_rows, columns=["f", "Empirical", "CI low", "CI high"])
+        df["Empirical (%)"] = empirical["Empirical"] * 100
+        df["95% CI (%)"] = [f"{lo * 100:.2f} – {hi * 100:.2f}" for lo, hi in zip(empirical["CI low"], empirical["CI high"])]
+        columns += ["Empirical (%)", "95% CI (%)"]
+    st.table(df[columns])
+
+
+def ruin_comparison_chart(
+    ruin_rows: list[tuple[float, float]],
+    empirical_rows: list[tuple[float, float, float, float]] | None = None,
+) -> None:
+    """Risk of ruin per f from the approximation and the trades, with the empirical CI band."""
+    curves = [pd.DataFrame(ruin_rows, columns=["f", "ruin"]).assign(model="近似式")]
+    if empirical_rows:
+        empirical = pd.DataFrame(empirical_rows, columns=["f", "ruin", "low", "high"]).assign(model="実測MC")
+        curves.append(empirical[["f", "ruin", "model"]])
+    chart = (
+        alt.Chart(pd.concat(curves))
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("f:Q", title="f"),
+            y=alt.Y("ruin:Q", title="破産確率", axis=alt.Axis(format="%")),
+            color=alt.Color("model:N", title=""),
+        )
+    )
+    if empirical_rows:
+        chart = alt.Chart(empirical).mark_area(opacity=0.2).encode(x="f:Q", y="low:Q", y2="high:Q") + chart
+    st.altair_chart(chart)
+
+
+def optimal_f_section(result, safety: float, on_apply) -> None:
+    """Growth-optimal f from the simulated R-multiples, its growth curve and an apply button."""
+    st.subheader("最適 f（実測 R からの期待対数成長最大化）")
+    cols = st.columns(3)
+    cols[0].metric("最適 f (Kelly)", f"{result.kelly_f * 100:.2f}%")
+    cols[1].metric("推奨 f", f"{result.f * 100:.2f}%")
+    cols[2].metric("1トレードあたり期待対数成長", f"{result.growth:.5f}")
+    if result.max_drawdown is not None:
+        st.caption(f"実際の順序で再生したときの最大ドローダウン: {result.max_drawdown * 100:.2f}%")
+    curve = pd.DataFrame({"f": result.curve_f, "growth": result.curve_growth})
+    chart = alt.Chart(curve).mark_line().encode(
+        x=alt.X("f:Q", title="f", axis=alt.Axis(format="%")),
+        y=alt.Y("growth:Q", title="期待対数成長 / トレード"),
+    )
+    marks = pd.DataFrame({"f": [result.kelly_f, result.f], "label": ["Kelly", "推奨"]})
+    chart += alt.Chart(marks).mark_rule(strokeDash=[4, 4]).encode(x="f:Q", color=alt.Color("label:N", title=""))
+    st.altair_chart(chart)
+    st.button(
+        f"推奨 f × {safety:g} をサイドバーに適用 (Fixed Fractional)",
+        on_click=on_apply,
+        args=(result.f * safety,),
+        disabled=result.f <= 0,
+    )
+
+
+BREAKDOWN_LABELS = {
+    "group": "区分",
+    "trade_count": "トレード数",
+    "win_rate": "勝率",
+    "total_pnl": "損益合計(円)",
+    "avg_pnl": "平均損益(円)",
+    "avg_pnl_pct": "平均損益(初期資産比)",
+    "avg_r": "平均R",
+    "max_drawdown": "最大ドローダウン",
+    "max_dd_duration": "最大DD期間",
+    "final_equity": "最終資産",
+    "cagr": "CAGR",
+    "max_portfolio_risk": "同時リスク合計(最大)",
+}
+
+
+def breakdown_table(df: pd.DataFrame) -> None:
+    """Grouped metrics from ``grouped_metrics``, sorted by total PnL."""
+    if df.empty:
+        st.info("集計対象のトレードがありません。")
+        return
+    view = df.sort_values("total_pnl", ascending=False).copy()
+    for column in ("win_rate", "avg_pnl_pct", "max_drawdown", "cagr", "max_portfolio_risk"):
+        view[column] = view[column] * 100
+    st.dataframe(
+        view.rename(columns=BREAKDOWN_LABELS),
+        hide_index=True,
+        column_config={
+            BREAKDOWN_LABELS[c]: st.column_config.NumberColumn(format="%.2f%%")
+            for c in ("win_rate", "avg_pnl_pct", "max_drawdown", "cagr", "max_portfolio_risk")
+        },
+    )
+
+
+def cache_stats_table(stats: dict) -> None:
+    """One column per cache with its ``stats()`` counters; rates and sizes formatted."""
+    table = {}
+    for name, values in stats.items():
+        table[name] = {
+            key: f"{value * 100:.1f}%" if key == "hit_rate" else f"{value / 2**20:,.1f} MiB" if "bytes" in key else f"{value:,}"
+            for key, value in values.items()
+        }
+    st.table(pd.DataFrame(table).fillna("-"))
+
+
+def preset_index_table(index: list[dict]) -> None:
+    df = pd.DataFrame(index).rename(
+        columns={"name": "名前", "sizing_mode": "資金管理方式", "overlap_mode": "重複の扱い", "updated_at": "更新日時"}
+    )
+    st.dataframe(df, hide_index=True)
+
+
+PRESET_RANKING_LABELS = {
+    "rank": "順位",
+    "preset": "プリセット",
+    "sizing_mode": "資金管理方式",
+    "f": "f",
+    "max_portfolio_risk": "同時リスク上限",
+    "final_equity": "最終資産",
+    "cagr": "CAGR",
+    "max_drawdown": "最大ドローダウン",
+    "max_dd_duration": "最大DD期間",
+}
+
+
+def preset_ranking_table(df: pd.DataFrame) -> None:
+    """Ranked result of ``evaluate_presets``."""
+    if df.empty:
+        st.info("条件に合うプリセットがありません。")
+        return
+    view = df[[c for c in PRESET_RANKING_LABELS if c in df.columns]].copy()
+    for column in ("cagr", "max_drawdown"):
+        view[column] = view[column] * 100
+    st.dataframe(
+        view.rename(columns=PRESET_RANKING_LABELS),
+        hide_index=True,
+        column_config={
+            PRESET_RANKING_LABELS[c]: st.column_config.NumberColumn(format="%.2f%%") for c in ("cagr", "max_drawdown")
+        },
+    )
+
+
+ROLLING_LABELS = {
+    "win_rate": "勝率",
+    "avg_r": "平均R",
+    "profit_factor": "プロフィットファクター",
+    "max_drawdown": "最大ドローダウン",
+}
+
+
+def rolling_metrics_chart(rolling) -> None:
+    """Stacked line charts of a precomputed ``RollingMetrics``, one panel per metric."""
+    if not len(rolling):
+        return
+    frame = rolling.to_frame()
+    metrics = [frame[name].to_numpy(dtype=float) for name in ROLLING_LABELS]
+    frame = frame.iloc[downsample_indices(metrics, config.MAX_CHART_POINTS)]
+    long = frame.melt(id_vars="exit_time", value_vars=list(ROLLING_LABELS), var_name="metric", value_name="value")
+    long["metric"] = long["metric"].map(ROLLING_LABELS)
+    chart = (
+        alt.Chart(long)
+        .mark_line()
+        .encode(x=alt.X("exit_time:T", title="決済日時"), y=alt.Y("value:Q", title=None))
+        .properties(height=140)
+        .facet(row=alt.Row("metric:N", title=None, sort=list(ROLLING_LABELS.values())))
+        .resolve_scale(y="independent")
+    )
+    st.altair_chart(chart)
+
+
+def sweep_heatmap(sweep_df: pd.DataFrame, x: str, y: str, value: str, labels: dict) -> None:
+    if sweep_df.empty:
+        return
+    chart = (
+        alt.Chart(sweep_df)
+        .mark_rect()
+        .encode(
+            x=alt.X(f"{x}:O", title=labels.get(x, x), axis=alt.Axis(format=".3~g")),
+            y=alt.Y(f"{y}:O", title=labels.get(y, y), sort="descending", axis=alt.Axis(format=".3~g")),
+            color=alt.Color(f"{value}:Q", title=value, scale=alt.Scale(scheme="redyellowgreen")),
+            tooltip=[x, y, "final_equity", "cagr", "max_drawdown", "max_dd_duration"],
+        )
+    )
+    st.altair_chart(chart)
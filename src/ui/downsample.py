@@ -0,0 +1,70 @@
+"""Server-side reduction of chart data to a bounded number of points.
+
+Charts receive a few thousand points whatever the data size:
+
+- ``minmax_indices``: per bucket the first, lowest and highest point (and the
+  last point overall), so every peak and trough of the series is drawn
+- ``histogram_table``: pre-binned counts instead of raw samples
+- ``downsample_indices``: union of min/max picks over several aligned series,
+  plus indices that must be kept exactly (e.g. the max-drawdown peak and trough)
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+def _bucket_matrix(y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, int]:
+    """``y`` as ``(n_buckets, size)`` rows of consecutive points, NaN-padded."""
+    size = -(-len(y) // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[: len(y)] = y
+    return padded.reshape(n_buckets, size), size
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Sorted indices of each bucket's first, min and max point, plus the last point."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 3 * n_buckets:
+        return np.arange(n)
+    n_buckets = -(-n // -(-n // n_buckets))  # drop buckets made only of padding
+    matrix, size = _bucket_matrix(y, n_buckets)
+    missing = np.isnan(matrix)  # padding and NaN points are never picked as extremes
+    starts = np.arange(n_buckets) * size
+    highest = np.argmax(np.where(missing, -np.inf, matrix), axis=1)
+    lowest = np.argmin(np.where(missing, np.inf, matrix), axis=1)
+    return np.unique(np.concatenate([starts, starts + highest, starts + lowest, [n - 1]]))
+
+
+def drawdown_extremes(equity: np.ndarray) -> np.ndarray:
+    """Indices of the peak and the trough of the maximum drawdown."""
+    equity = np.asarray(equity, dtype=float)
+    if not len(equity):
+        return np.empty(0, dtype=np.int64)
+    peaks = np.maximum.accumulate(equity)
+    trough = int(np.argmin(equity / peaks))
+    peak = int(np.argmax(equity[: trough + 1]))
+    return np.array([peak, trough])
+
+
+def downsample_indices(series: Sequence[np.ndarray], max_points: int, keep: Iterable[int] = ()) -> np.ndarray:
+    """Rows to draw for aligned ``series`` so each keeps its extremes, within about ``max_points``."""
+    n = len(series[0]) if len(series) else 0
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, max_points // (3 * len(series)))
+    picks = [minmax_indices(values, buckets) for values in series]
+    return np.unique(np.concatenate(picks + [np.asarray(list(keep), dtype=np.int64)]))
+
+
+def histogram_table(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """``(bin centers, counts)`` of the finite values."""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    counts, edges = np.histogram(values, bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, counts
@@ -2,36 +2,59 @@
 
 from __future__ import annotations
 
-import io
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
 import streamlit as st
 
 from src import config
-from src.data.loader import load_trades_csv
-from src.models.trade import Trade
+from src.data.cache import default_cache
+from src.data.loader import TradeSource
+from src.models.book import TradeBook
 from src.risk.sizing import PositionSizingMode, PositionSizingParams
 from src.simulation.engine import SimulationSettings
+from src.simulation.jobs import JobRegistry, JobStatus
+from src.simulation.overlap import OverlapMode
+from src.ui import components
 
 
-def sidebar_settings() -> Tuple[SimulationSettings, Optional[pd.DataFrame]]:
+SIZING_MODE_OPTIONS = [
+    ("Fixed Fractional", PositionSizingMode.FIXED_FRACTIONAL),
+    ("Fractional Kelly", PositionSizingMode.FRACTIONAL_KELLY),
+    ("Fixed Lot / Notional", PositionSizingMode.FIXED_LOT),
+]
+
+
+def apply_fixed_fraction(f: float) -> None:
+    """Button callback: switch the sidebar to Fixed Fractional with risk ``f``."""
+    st.session_state["sizing_mode"] = SIZING_MODE_OPTIONS[0]
+    st.session_state["sizing_f_pct"] = min(max(f * 100, 0.0), 100.0)
+
+
+def sidebar_settings() -> Tuple[SimulationSettings, Optional[TradeSource]]:
     st.sidebar.header("設定")
     initial_equity = st.sidebar.number_input("初期資金 (円)", value=config.DEFAULT_INITIAL_EQUITY, min_value=0.0)
     max_portfolio_risk = st.sidebar.number_input(
         "同時最大リスク合計(%)", value=config.DEFAULT_MAX_PORTFOLIO_RISK * 100, min_value=0.0, max_value=100.0
     ) / 100
 
-    sizing_mode = st.sidebar.selectbox(
-        "資金管理方式",
+    overlap_mode = st.sidebar.selectbox(
+        "ポジション重複の扱い",
         [
-            ("Fixed Fractional", PositionSizingMode.FIXED_FRACTIONAL),
-            ("Fractional Kelly", PositionSizingMode.FRACTIONAL_KELLY),
-            ("Fixed Lot / Notional", PositionSizingMode.FIXED_LOT),
+            ("考慮しない (トレード単体でリスク判定)", OverlapMode.SEQUENTIAL),
+            ("同時リスク上限までロット縮小", OverlapMode.SCALE),
+            ("上限を超える新規トレードをスキップ", OverlapMode.SKIP),
         ],
         format_func=lambda x: x[0],
     )[1]
 
+    sizing_mode = st.sidebar.selectbox(
+        "資金管理方式",
+        SIZING_MODE_OPTIONS,
+        format_func=lambda x: x[0],
+        key="sizing_mode",
+    )[1]
+
     params = PositionSizingParams()
     if sizing_mode == PositionSizingMode.FRACTIONAL_KELLY:
         params.p = st.sidebar.number_input("勝率 p", value=0.5, min_value=0.0, max_value=1.0)
@@ -43,31 +66,109 @@ def sidebar_settings() -> Tuple[SimulationSettings, Optional[pd.DataFrame]]:
         params.fixed_quantity = st.sidebar.number_input("固定数量 (株/ロット)", value=0.0, min_value=0.0)
         params.fixed_notional = st.sidebar.number_input("固定金額 (円)", value=0.0, min_value=0.0)
     else:
+        # Keyed and initialised through session state so apply_fixed_fraction
+        # can overwrite it from a button callback.
+        st.session_state.setdefault("sizing_f_pct", config.DEFAULT_FRACTIONAL_RISK * 100)
         params.f = st.sidebar.number_input(
             "1トレードリスク f (％)",
-            value=config.DEFAULT_FRACTIONAL_RISK * 100,
             min_value=0.0,
             max_value=100.0,
+            key="sizing_f_pct",
         ) / 100
 
+    # The uploaded file is a BytesIO; it is handed to the loader as-is and
+    # parsed exactly once there.
     uploaded = st.sidebar.file_uploader("トレード履歴 CSV", type=["csv"])
-    uploaded_df = None
-    if uploaded is not None:
-        uploaded_df = pd.read_csv(uploaded)
 
     settings = SimulationSettings(
         initial_equity=initial_equity,
         sizing_mode=sizing_mode,
         sizing_params=params,
         max_portfolio_risk=max_portfolio_risk,
+        overlap_mode=overlap_mode,
     )
-    return settings, uploaded_df
+    return settings, uploaded
+
+
+def parse_trades(uploaded: Optional[TradeSource]) -> TradeBook:
+    """Parse the upload, reusing the on-disk cache when the same bytes were seen before."""
+    if uploaded is None:
+        return TradeBook.empty()
+    try:
+        return default_cache().load(uploaded)
+    except ValueError as exc:
+        st.sidebar.error(f"CSV の読み込みに失敗しました:\n{exc}")
+        return TradeBook.empty()
+
+
+SWEEP_AXES = {
+    PositionSizingMode.FIXED_FRACTIONAL: [("f", "1トレードリスク f", 0.005, 0.05), ("max_portfolio_risk", "同時最大リスク", 0.01, 0.1)],
+    PositionSizingMode.FRACTIONAL_KELLY: [
+        ("safety_coefficient", "安全係数 c", 0.1, 1.0),
+        ("max_portfolio_risk", "同時最大リスク", 0.01, 0.1),
+    ],
+    PositionSizingMode.FIXED_LOT: [("fixed_quantity", "固定数量", 1.0, 100.0), ("max_portfolio_risk", "同時最大リスク", 0.01, 0.1)],
+}
+
+
+def sweep_controls(settings: SimulationSettings) -> Tuple[Dict[str, List[float]], Dict[str, str]]:
+    """Inputs for a 2-axis sweep grid; returns the axes and their labels."""
+    axes: Dict[str, List[float]] = {}
+    labels: Dict[str, str] = {}
+    columns = st.columns(len(SWEEP_AXES[settings.sizing_mode]))
+    for column, (name, label, low, high) in zip(columns, SWEEP_AXES[settings.sizing_mode]):
+        with column:
+            start = st.number_input(f"{label} 最小", value=low, min_value=0.0, key=f"sweep_{name}_min")
+            stop = st.number_input(f"{label} 最大", value=high, min_value=0.0, key=f"sweep_{name}_max")
+            steps = st.number_input(f"{label} 分割数", value=10, min_value=1, max_value=200, key=f"sweep_{name}_steps")
+        axes[name] = np.linspace(start, stop, int(steps)).tolist()
+        labels[name] = label
+    return axes, labels
+
+
+def session_jobs() -> JobRegistry:
+    """This session's background jobs (kept across reruns)."""
+    return st.session_state.setdefault("jobs", JobRegistry())
+
+
+def _job_body(name: str, render: Callable[[Any], None]) -> None:
+    job = session_jobs().get(name)
+    if job is None:
+        return
+    status = job.status
+    if job.description:
+        st.caption(job.description)
+    if status in (JobStatus.PENDING, JobStatus.RUNNING):
+        text = "待機中…" if status == JobStatus.PENDING else f"実行中… {job.done:,} / {job.total:,}（{job.elapsed:.0f} 秒）"
+        cols = st.columns([4, 1])
+        cols[0].progress(job.fraction, text=text)
+        cols[1].button("キャンセル", key=f"{name}_cancel", on_click=job.cancel)
+        partial = job.partial()
+        if partial is not None:
+            st.caption("途中経過（完了すると最終結果に置き換わります）")
+            render(partial)
+        return
+    if status == JobStatus.FAILED:
+        st.error(f"実行に失敗しました: {job.error()}")
+    elif status == JobStatus.CANCELLED:
+        st.warning(f"キャンセルしました（{job.done:,} / {job.total:,} 時点）。")
+        partial = job.partial()
+        if partial is not None:
+            render(partial)
+    else:
+        st.caption(f"完了（{job.elapsed:.1f} 秒）")
+        render(job.result())
+    if st.session_state.pop(f"{name}_polling", False):
+        st.rerun()  # full rerun so the panel stops polling
+
 
+def job_panel(name: str, render: Callable[[Any], None]) -> None:
+    """Progress, cancel button and (partial) result of the session's job ``name``.
 
-def parse_trades(uploaded_df: Optional[pd.DataFrame]) -> List[Trade]:
-    if uploaded_df is None:
-        return []
-    buffer = io.StringIO()
-    uploaded_df.to_csv(buffer, index=False)
-    buffer.seek(0)
-    return load_trades_csv(buffer)
+    Polls once a second while the job runs; ``render`` draws a result.
+    """
+    job = session_jobs().get(name)
+    running = job is not None and not job.finished
+    if running:
+        st.session_state[f"{name}_polling"] = True
+    st.fragment(_job_body, run_every=1.0 if running else None)(name, render)